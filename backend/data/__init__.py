@@ -13,18 +13,19 @@ Author: Nicolas Angougeard
 
 __version__ = "1.0.0"
 
-from .collectors import (
-    DATAtourismeCollector,
-    INSEEMelodiCollector,
-    OpendatasoftCollector,
-    OpenMeteoCollector,
-    get_all_collectors
-)
+from .collectors import get_all_collectors
 
 __all__ = [
     "DATAtourismeCollector",
-    "INSEEMelodiCollector",
     "OpendatasoftCollector",
     "OpenMeteoCollector",
     "get_all_collectors",
 ]
+
+
+def __getattr__(name: str):
+    # Collectors are resolved lazily through data.collectors
+    if name in __all__:
+        from . import collectors
+        return getattr(collectors, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
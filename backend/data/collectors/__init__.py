@@ -4,7 +4,8 @@ TourismIQ Platform - Data Collectors Module
 
 Unified data collection module that aggregates data from multiple sources:
 - DATAtourisme: French national tourism database
-- INSEE MELODI: Salary and socio-economic data
+- INSEE MELODI: Salary and socio-economic data (function-based, see
+  data.ingestion.insee_melodi_collector; not exposed as a collector class)
 - Opendatasoft: Population and geographic data
 - OpenMeteo: Weather and climate data
 
@@ -17,29 +18,52 @@ Architecture:
 Author: Nicolas Angougeard
 """
 
+from __future__ import annotations
+
+import importlib
 from pathlib import Path
 import sys
+from typing import TYPE_CHECKING, Any, Dict
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-# Import collectors from ingestion module
-from data.ingestion.datatourisme_collector import DATAtourismeCollector
-from data.ingestion.insee_melodi_collector import INSEEMelodiCollector
-from data.ingestion.opendatasoft_collector import OpendatasoftCollector
-from data.ingestion.openmeteo_collector import OpenMeteoCollector
+# Collectors are imported lazily (PEP 562): each ingestion module pulls in
+# requests/pandas/pyarrow and reads .env, so only the requested one is loaded
+_LAZY = {
+    "DATAtourismeCollector": "data.ingestion.datatourisme_collector",
+    "OpendatasoftCollector": "data.ingestion.opendatasoft_collector",
+    "OpenMeteoCollector": "data.ingestion.openmeteo_collector",
+}
+
+if TYPE_CHECKING:
+    from data.ingestion.datatourisme_collector import DATAtourismeCollector
+    from data.ingestion.opendatasoft_collector import OpendatasoftCollector
+    from data.ingestion.openmeteo_collector import OpenMeteoCollector
 
 __version__ = "1.0.0"
 
 __all__ = [
     "DATAtourismeCollector",
-    "INSEEMelodiCollector",
     "OpendatasoftCollector",
     "OpenMeteoCollector",
 ]
 
 
-def get_all_collectors():
+def __getattr__(name: str) -> Any:
+    module_path = _LAZY.get(name)
+    if module_path is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    collector = getattr(importlib.import_module(module_path), name)
+    globals()[name] = collector  # Subsequent lookups skip __getattr__
+    return collector
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+
+def get_all_collectors() -> Dict[str, Any]:
     """
     Factory function to instantiate all available collectors.
 
@@ -47,8 +71,7 @@ def get_all_collectors():
         Dict[str, BaseCollector]: Dictionary of collector name to collector instance
     """
     return {
-        "datatourisme": DATAtourismeCollector(),
-        "insee": INSEEMelodiCollector(),
-        "opendatasoft": OpendatasoftCollector(),
-        "openmeteo": OpenMeteoCollector(),
+        "datatourisme": __getattr__("DATAtourismeCollector")(),
+        "opendatasoft": __getattr__("OpendatasoftCollector")(),
+        "openmeteo": __getattr__("OpenMeteoCollector")(),
     }
@@ -10,15 +10,22 @@ Usage:
 
 import os
 import sys
-import json
 import time
+import random
 import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
 from datetime import datetime
 
+import orjson
 import requests
 import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import pyarrow as pa
+import pyarrow.parquet as pq
 from dotenv import load_dotenv
 from tqdm import tqdm
 
@@ -32,6 +39,69 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Nombre de POIs conservés en mémoire pour print_sample
+SAMPLE_SIZE = 10
+
+
+def _to_json(value) -> Optional[str]:
+    """
+    Valeur d'une colonne JSON en texte
+
+    Objets/listes encodés en JSON, textes laissés tels quels (pas de double
+    encodage), valeurs manquantes à None, autres scalaires (y compris NumPy)
+    écrits sous leur forme JSON pour que la colonne reste de type texte.
+    """
+    if isinstance(value, str):
+        return value
+    if not isinstance(value, (dict, list)) and pd.isna(value):
+        return None
+    return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
+def _is_numeric(data_type: pa.DataType) -> bool:
+    return pa.types.is_integer(data_type) or pa.types.is_floating(data_type)
+
+
+def _promote_type(current: pa.DataType, new: pa.DataType) -> pa.DataType:
+    """
+    Type commun à deux types Arrow d'une même colonne
+
+    Colonne vide -> type de l'autre, entiers/flottants -> float64,
+    tout autre conflit -> texte (les scalaires castés en texte sont du JSON valide)
+    """
+    if current == new or pa.types.is_null(new):
+        return current
+    if pa.types.is_null(current):
+        return new
+    if _is_numeric(current) and _is_numeric(new):
+        return pa.float64()
+    return pa.string()
+
+
+def _unify_schemas(schemas: List[pa.Schema]) -> pa.Schema:
+    """Schéma couvrant toutes les colonnes rencontrées, dans leur ordre d'apparition"""
+    types: Dict[str, pa.DataType] = {}
+    for schema in schemas:
+        for field in schema:
+            types[field.name] = (
+                _promote_type(types[field.name], field.type) if field.name in types else field.type
+            )
+    return pa.schema(list(types.items()))
+
+
+def _conform_table(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    """Conforme une table au schéma unifié (colonnes absentes à null, types promus)"""
+    columns = []
+    for field in schema:
+        if field.name in table.column_names:
+            column = table.column(field.name)
+            if column.type != field.type:
+                column = column.cast(field.type, safe=False)
+        else:
+            column = pa.nulls(table.num_rows, field.type)
+        columns.append(column)
+    return pa.Table.from_arrays(columns, schema=schema)
+
 
 class DATAtourismeCollector:
     """Collector pour l'API DATAtourisme"""
@@ -45,10 +115,28 @@ class DATAtourismeCollector:
 
         self.headers = {
             "X-API-Key": self.api_key,
-            "Accept": "application/json"
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate"
         }
 
-        self.pois = []
+        # Session HTTP persistante (keep-alive) : une seule connexion TLS pour toute la pagination.
+        # Les erreurs serveur transitoires sont réessayées par urllib3 ; le rate limit (429)
+        # est géré dans _make_request.
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        retry = Retry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=[500, 502, 503, 504],
+            allowed_methods=["GET"],
+            raise_on_status=False
+        )
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=retry))
+
+        # Les POIs sont écrits en Parquet au fil de la collecte : on ne garde en mémoire
+        # qu'un échantillon et la distribution des types
+        self.sample_pois = []
+        self.types_counter = Counter()
         self.stats = {
             "total_collected": 0,
             "api_calls": 0,
@@ -56,49 +144,71 @@ class DATAtourismeCollector:
             "start_time": datetime.now()
         }
 
-    def _make_request(self, endpoint: str, params: Dict = None) -> Optional[Dict]:
-        """Fait une requête à l'API avec gestion d'erreurs"""
+        # Colonnes encodées en JSON (objets/listes), complétée au fil des batchs
+        self._json_columns: List[str] = []
+        # Colonnes déjà vues avec des valeurs scalaires, non re-sondées
+        self._scalar_columns: Set[str] = set()
+
+    def _make_request(self, endpoint: str, params: Dict = None, max_retries: int = 6) -> Optional[Dict]:
+        """Fait une requête à l'API avec gestion d'erreurs (backoff exponentiel sur rate limit)"""
         url = f"{self.base_url}/{endpoint}"
 
-        try:
-            self.stats["api_calls"] += 1
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
+        for attempt in range(max_retries + 1):
+            try:
+                self.stats["api_calls"] += 1
+                response = self.session.get(url, params=params, timeout=30)
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Request failed: {str(e)}")
+                self.stats["errors"] += 1
+                return None
 
             if response.status_code == 200:
                 return response.json()
-            elif response.status_code == 429:
-                # Rate limit: attendre avant de réessayer
-                logger.warning("Rate limit hit, waiting 60s...")
-                time.sleep(60)
-                return self._make_request(endpoint, params)
-            else:
-                logger.error(f"HTTP {response.status_code}: {response.text[:200]}")
-                self.stats["errors"] += 1
-                return None
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Request failed: {str(e)}")
+            if response.status_code == 429 and attempt < max_retries:
+                # Rate limit: attendre avant de réessayer (Retry-After si fourni, sinon backoff + jitter)
+                retry_after = response.headers.get("Retry-After", "")
+                wait = float(retry_after) if retry_after.isdigit() else min(60, 2 ** attempt) + random.uniform(0, 1)
+                logger.warning(f"Rate limit hit, waiting {wait:.1f}s (retry {attempt + 1}/{max_retries})...")
+                time.sleep(wait)
+                continue
+
+            logger.error(f"HTTP {response.status_code}: {response.text[:200]}")
             self.stats["errors"] += 1
             return None
 
+    def _fetch_page(self, params: Dict, delay: float = 0.0) -> Optional[Dict]:
+        """Récupère une page du catalogue, après un délai optionnel (rate limiting soft)"""
+        if delay:
+            time.sleep(delay)
+        return self._make_request("catalog", params)
+
     def collect_pois(
         self,
+        output_path: str,
         limit: int = 50000,
         page_size: int = 250,
         filters: Optional[Dict] = None,
         save_interval: int = 5000
-    ) -> List[Dict]:
+    ) -> int:
         """
-        Collecte les POIs avec pagination
+        Collecte les POIs avec pagination et les écrit en Parquet au fil de l'eau
+
+        Les pages sont regroupées en row groups de save_interval POIs, écrits
+        chacun dans un fichier partiel (checkpoint) : la mémoire utilisée reste
+        bornée. En fin de collecte, y compris si elle est interrompue, les
+        fichiers partiels sont fusionnés dans le fichier de sortie avec un schéma
+        unifié (colonnes apparues en cours de route, types élargis).
 
         Args:
+            output_path: Fichier Parquet de sortie
             limit: Nombre max de POIs à collecter
             page_size: Taille de page API (max 250)
             filters: Filtres optionnels (ex: type, zone géo)
-            save_interval: Sauvegarder tous les N POIs
+            save_interval: Écrire un row group Parquet tous les N POIs
 
         Returns:
-            Liste de POIs
+            Nombre de POIs collectés
         """
         logger.info(f"Starting collection: target={limit}, page_size={page_size}")
 
@@ -106,111 +216,188 @@ class DATAtourismeCollector:
         if filters:
             params.update(filters)
 
-        pbar = tqdm(total=limit, desc="Collecting POIs")
-
-        while len(self.pois) < limit:
-            # Requête API
-            response = self._make_request("catalog", params)
-
-            if not response or "objects" not in response:
-                logger.error("Invalid response, stopping collection")
-                break
-
-            # Extraire POIs
-            pois_batch = response["objects"]
-
-            if not pois_batch:
-                logger.info("No more POIs available")
-                break
-
-            # Ajouter à la collection
-            self.pois.extend(pois_batch)
-            self.stats["total_collected"] = len(self.pois)
-
-            pbar.update(len(pois_batch))
-
-            # Sauvegarde incrémentale
-            if len(self.pois) % save_interval == 0:
-                self._save_checkpoint()
-
-            # Pagination: utiliser le lien "next" fourni par l'API
-            meta = response.get("meta", {})
-            next_url = meta.get("next")
-
-            if not next_url:
-                logger.info("No next page, collection complete")
-                break
-
-            # Extraire les paramètres du next URL
-            # Format: https://api.datatourisme.fr/v1/catalog?page_size=250&crs=...
-            # On garde juste le cursor (crs)
-            if "crs=" in next_url:
-                crs = next_url.split("crs=")[1].split("&")[0]
-                params["crs"] = crs
+        output_file = Path(output_path)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
 
-            # Rate limiting soft (respecter l'API)
-            time.sleep(0.1)
+        parts: List[Path] = []  # Fichiers partiels, un par row group
+        row_group = []  # Tables Arrow en attente d'écriture
+        row_group_size = 0
+        pbar = tqdm(total=limit, desc="Collecting POIs")
 
-        pbar.close()
+        # La page suivante est téléchargée en arrière-plan pendant l'encodage et
+        # l'écriture Parquet de la page courante (le curseur crs impose un ordre
+        # séquentiel, mais réseau et écriture disque se recouvrent)
+        prefetcher = ThreadPoolExecutor(max_workers=1)
+        pending = prefetcher.submit(self._fetch_page, dict(params)) if limit > 0 else None
 
-        # Trim si on a dépassé la limite
-        self.pois = self.pois[:limit]
-        self.stats["total_collected"] = len(self.pois)
+        try:
+            while pending is not None:
+                # Requête API
+                response = pending.result()
+                pending = None
+
+                if not response or "objects" not in response:
+                    logger.error("Invalid response, stopping collection")
+                    break
+
+                # Extraire POIs (trim si on dépasse la limite)
+                pois_batch = response["objects"][:limit - self.stats["total_collected"]]
+
+                if not pois_batch:
+                    logger.info("No more POIs available")
+                    break
+
+                # Pagination: utiliser le lien "next" fourni par l'API
+                meta = response.get("meta", {})
+                next_url = meta.get("next")
+
+                # Extraire les paramètres du next URL
+                # Format: https://api.datatourisme.fr/v1/catalog?page_size=250&crs=...
+                # On garde juste le cursor (crs)
+                if next_url and "crs=" in next_url:
+                    crs = next_url.split("crs=")[1].split("&")[0]
+                    params["crs"] = crs
+
+                # Lancer la requête suivante (avec rate limiting soft) avant d'écrire ce batch
+                if next_url and self.stats["total_collected"] + len(pois_batch) < limit:
+                    pending = prefetcher.submit(self._fetch_page, dict(params), 0.1)
+
+                row_group.append(self._batch_to_table(pois_batch))
+                row_group_size += len(pois_batch)
+
+                self._track_batch(pois_batch)
+                pbar.update(len(pois_batch))
+
+                # Sauvegarde incrémentale : un row group Parquet tous les save_interval POIs
+                if row_group_size >= save_interval:
+                    parts.append(self._write_row_group(output_file, len(parts), row_group))
+                    row_group, row_group_size = [], 0
+
+                if not next_url:
+                    logger.info("No next page, collection complete")
+        finally:
+            prefetcher.shutdown(wait=True, cancel_futures=True)
+            pbar.close()
+            # Écrire les POIs restants et finaliser le fichier (y compris en cas d'interruption)
+            if row_group:
+                parts.append(self._write_row_group(output_file, len(parts), row_group))
+            if parts:
+                self._merge_parts(parts, output_file)
 
         logger.info(f"Collection complete: {self.stats['total_collected']} POIs")
-        return self.pois
-
-    def _save_checkpoint(self):
-        """Sauvegarde checkpoint intermédiaire"""
-        checkpoint_file = Path("data/raw/datatourisme_checkpoint.json")
-        checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
-
-        with open(checkpoint_file, "w", encoding="utf-8") as f:
-            # Convertir datetime en string pour JSON
-            stats_serializable = {**self.stats}
-            stats_serializable["start_time"] = self.stats["start_time"].isoformat()
-            stats_serializable["checkpoint_time"] = datetime.now().isoformat()
-
-            json.dump({
-                "pois": self.pois,
-                "stats": stats_serializable
-            }, f, ensure_ascii=False, indent=2)
-
-        logger.info(f"Checkpoint saved: {len(self.pois)} POIs")
 
-    def save_to_parquet(self, output_path: str):
-        """Sauvegarde les POIs en format Parquet"""
-        if not self.pois:
+        if not parts:
             logger.warning("No POIs to save")
-            return
-
-        # Convertir en DataFrame
-        df = pd.DataFrame(self.pois)
+        else:
+            logger.info(f"✅ Saved {self.stats['total_collected']} POIs to {output_path}")
+            logger.info(f"   File size: {output_file.stat().st_size / 1024 / 1024:.2f} MB")
+            self._log_stats()
 
-        # Convertir les colonnes complexes (objets/listes) en JSON strings
-        # pour compatibilité Parquet
-        complex_columns = []
-        for col in df.columns:
-            # Détecter les colonnes avec des types complexes
-            sample = df[col].dropna().iloc[0] if not df[col].dropna().empty else None
-            if sample is not None and (isinstance(sample, (dict, list))):
-                complex_columns.append(col)
+        return self.stats["total_collected"]
 
-        logger.info(f"Converting {len(complex_columns)} complex columns to JSON strings")
-        for col in complex_columns:
-            df[col] = df[col].apply(lambda x: json.dumps(x, ensure_ascii=False) if x is not None else None)
+    def _batch_to_table(self, pois_batch: List[Dict]) -> pa.Table:
+        """
+        Convertit un batch de POIs en table Arrow
 
-        # Créer le dossier de sortie si nécessaire
-        output_file = Path(output_path)
-        output_file.parent.mkdir(parents=True, exist_ok=True)
+        Les colonnes complexes (objets/listes) sont converties en JSON strings
+        pour compatibilité Parquet. Chaque batch garde ses propres colonnes et
+        types, le schéma commun est établi à la fusion finale.
+        """
+        df = pd.DataFrame(pois_batch)
 
-        # Sauvegarder en Parquet
-        df.to_parquet(output_file, index=False, compression="snappy")
+        # Seules les colonnes pas encore classées (JSON ou scalaire) sont sondées
+        self._probe_json_columns(df, [
+            col for col in df.columns
+            if col not in self._json_columns and col not in self._scalar_columns
+        ])
+        try:
+            table = self._encode_table(df)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            table = None
+        if table is None or any(
+            pa.types.is_nested(f.type) for f in table.schema if f.name not in self._json_columns
+        ):
+            # Une colonne scalaire a reçu des objets/listes : re-sonder toutes les colonnes
+            self._probe_json_columns(
+                df, [col for col in df.columns if col not in self._json_columns]
+            )
+            table = self._encode_table(df)
+        return table
+
+    def _probe_json_columns(self, df: pd.DataFrame, columns: List[str]):
+        """
+        Classe les colonnes en JSON (objets/listes) ou scalaires
 
-        logger.info(f"✅ Saved {len(df)} POIs to {output_path}")
-        logger.info(f"   File size: {output_file.stat().st_size / 1024 / 1024:.2f} MB")
+        Le sondage s'arrête au premier objet trouvé ; une colonne entièrement
+        vide n'est pas classée et garde le type null, élargi à la fusion des schémas.
+        """
+        new_json_columns = []
+        for col in columns:
+            values = df[col].to_numpy()
+            if values.dtype == object and any(isinstance(v, (dict, list)) for v in values):
+                new_json_columns.append(col)
+                if col in self._scalar_columns:
+                    self._scalar_columns.remove(col)
+            elif col not in self._scalar_columns and pd.notna(values).any():
+                self._scalar_columns.add(col)
+        if new_json_columns:
+            self._json_columns.extend(new_json_columns)
+            logger.info(f"Converting {len(new_json_columns)} new complex columns to JSON strings")
+
+    def _encode_table(self, df: pd.DataFrame) -> pa.Table:
+        """Encode les colonnes JSON du batch et le convertit en table Arrow"""
+        json_columns = [col for col in self._json_columns if col in df.columns]
+        for col in json_columns:
+            # _to_json laisse les chaînes intactes : ré-encoder après re-sondage est sans effet
+            df[col] = list(map(_to_json, df[col].to_numpy()))
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        return _conform_table(table, pa.schema([
+            pa.field(f.name, pa.string()) if f.name in json_columns else f
+            for f in table.schema
+        ]))
+
+    def _track_batch(self, pois_batch: List[Dict]):
+        """Met à jour compteurs, échantillon et distribution des types après écriture d'un batch"""
+        self.stats["total_collected"] += len(pois_batch)
+
+        if len(self.sample_pois) < SAMPLE_SIZE:
+            self.sample_pois.extend(pois_batch[:SAMPLE_SIZE - len(self.sample_pois)])
+
+        for poi in pois_batch:
+            poi_types = poi.get("type")
+            if isinstance(poi_types, list):
+                self.types_counter.update(poi_types)
+            elif poi_types is not None:
+                self.types_counter[poi_types] += 1
+
+    def _write_row_group(self, output_file: Path, index: int, tables: List[pa.Table]) -> Path:
+        """Écrit les batchs en attente comme un row group, dans un fichier partiel"""
+        schema = _unify_schemas([t.schema for t in tables])
+        table = pa.concat_tables([_conform_table(t, schema) for t in tables])
+        part_file = output_file.with_name(f"{output_file.stem}.part{index:04d}{output_file.suffix}")
+        pq.write_table(table, part_file, compression="snappy", row_group_size=table.num_rows)
+        logger.info(f"Row group written: {self.stats['total_collected']} POIs saved")
+        return part_file
+
+    def _merge_parts(self, parts: List[Path], output_file: Path):
+        """
+        Fusionne les fichiers partiels dans le fichier de sortie
 
-        # Stats finales
+        Le schéma final unifie ceux des row groups : les colonnes apparues en
+        cours de collecte sont conservées (null avant leur apparition) et les
+        types divergents sont élargis. Les parties sont relues une à une.
+        """
+        schema = _unify_schemas([pq.read_schema(part) for part in parts])
+        with pq.ParquetWriter(output_file, schema, compression="snappy") as writer:
+            for part in parts:
+                table = _conform_table(pq.read_table(part), schema)
+                writer.write_table(table, row_group_size=table.num_rows)
+        for part in parts:
+            part.unlink()
+
+    def _log_stats(self):
+        """Affiche les statistiques finales de collecte"""
         duration = (datetime.now() - self.stats["start_time"]).total_seconds()
         logger.info(f"📊 Collection Stats:")
         logger.info(f"   - POIs collected: {self.stats['total_collected']}")
@@ -219,29 +406,30 @@ class DATAtourismeCollector:
         logger.info(f"   - Duration: {duration:.1f}s")
         logger.info(f"   - Avg speed: {self.stats['total_collected'] / duration:.1f} POIs/s")
 
-    def get_poi_types_distribution(self) -> Dict[str, int]:
-        """Analyse la distribution des types de POIs"""
-        if not self.pois:
-            return {}
+    def get_poi_types_distribution(self, top_n: Optional[int] = None) -> Dict[str, int]:
+        """
+        Analyse la distribution des types de POIs
 
-        df = pd.DataFrame(self.pois)
+        Les types sont comptés au fil de la collecte, aucun DataFrame n'est
+        reconstruit ici.
 
-        # Explode les types (car c'est une liste)
-        if "type" in df.columns:
-            types_series = df["type"].explode()
-            return types_series.value_counts().to_dict()
+        Args:
+            top_n: Ne retourner que les N types les plus fréquents
 
-        return {}
+        Returns:
+            Nombre de POIs par type, trié par fréquence décroissante
+        """
+        return dict(self.types_counter.most_common(top_n))
 
     def print_sample(self, n: int = 3):
         """Affiche un échantillon de POIs"""
-        if not self.pois:
+        if not self.sample_pois:
             logger.warning("No POIs collected yet")
             return
 
-        logger.info(f"\n📋 Sample of {min(n, len(self.pois))} POIs:")
+        logger.info(f"\n📋 Sample of {min(n, len(self.sample_pois))} POIs:")
 
-        for i, poi in enumerate(self.pois[:n], 1):
+        for i, poi in enumerate(self.sample_pois[:n], 1):
             print(f"\n--- POI {i} ---")
             print(f"UUID: {poi.get('uuid', 'N/A')}")
             print(f"Label: {poi.get('label', 'N/A')}")
@@ -275,23 +463,20 @@ def main():
     # Créer le collector
     collector = DATAtourismeCollector()
 
-    # Collecter les POIs
-    collector.collect_pois(limit=args.limit, page_size=args.page_size)
+    # Collecter les POIs (écrits en Parquet au fil de la collecte)
+    collector.collect_pois(args.output, limit=args.limit, page_size=args.page_size)
 
     # Afficher échantillon si demandé
     if args.sample:
         collector.print_sample(n=3)
 
     # Afficher distribution des types
-    types_dist = collector.get_poi_types_distribution()
+    types_dist = collector.get_poi_types_distribution(top_n=10)
     if types_dist:
         logger.info("\n📊 Top 10 POI Types:")
-        for poi_type, count in sorted(types_dist.items(), key=lambda x: x[1], reverse=True)[:10]:
+        for poi_type, count in types_dist.items():
             logger.info(f"   {poi_type}: {count}")
 
-    # Sauvegarder en Parquet
-    collector.save_to_parquet(args.output)
-
 
 if __name__ == "__main__":
     main()
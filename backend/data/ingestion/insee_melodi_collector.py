@@ -9,22 +9,19 @@ Sans jeton : 30 requêtes/minute (suffisant pour notre usage)
 Documentation API : https://api.insee.fr/catalogue/site/themes/wso2/subthemes/insee/pages/item-info.jag?name=Sirene&version=V3&provider=insee
 """
 
+import duckdb
 import requests
 import pandas as pd
 import time
+import zipfile
 from pathlib import Path
 from typing import Optional, Dict, List
 import json
 
-print("=" * 80)
-print("📊 TOURISMIQ - COLLECTEUR INSEE MELODI")
-print("=" * 80)
-
 # Configuration
 API_BASE_URL = "https://api.insee.fr/melodi/data"
 BASE_DIR = Path(__file__).parent.parent.parent
 OUTPUT_DIR = BASE_DIR / "data/raw"
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 # Limite de requêtes : 30/minute en accès libre
 REQUEST_DELAY = 2  # secondes entre chaque requête (30 req/min = 1 req/2s)
@@ -34,13 +31,16 @@ def download_melodi_dataset(dataset_id: str, filename: str) -> Path:
     """Télécharge un dataset depuis l'API Melodi"""
     url = f"https://api.insee.fr/melodi/file/{dataset_id}"
     output_path = OUTPUT_DIR / filename
+    output_path.parent.mkdir(parents=True, exist_ok=True)
 
     print(f"📥 Téléchargement {dataset_id}...")
-    response = requests.get(url, timeout=60)
-    response.raise_for_status()
+    # Écriture par blocs de 1 MB : le ZIP n'est jamais entièrement chargé en mémoire
+    with requests.get(url, timeout=60, stream=True) as response:
+        response.raise_for_status()
 
-    with open(output_path, 'wb') as f:
-        f.write(response.content)
+        with open(output_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=1 << 20):
+                f.write(chunk)
 
     print(f"✅ Téléchargé : {output_path} ({output_path.stat().st_size / 1024 / 1024:.1f} MB)")
     return output_path
@@ -48,8 +48,6 @@ def download_melodi_dataset(dataset_id: str, filename: str) -> Path:
 
 def extract_zip(zip_path: Path, extract_dir: Path) -> List[Path]:
     """Extrait un fichier ZIP"""
-    import zipfile
-
     print(f"📦 Extraction {zip_path.name}...")
     with zipfile.ZipFile(zip_path, 'r') as zip_ref:
         zip_ref.extractall(extract_dir)
@@ -93,44 +91,32 @@ def get_communes_economie(limit: int = None) -> pd.DataFrame:
 
     print(f"\n📊 Traitement des données : {data_file.name}")
 
-    # Charger uniquement les données au niveau communal
+    # Charger uniquement les données au niveau communal : DuckDB lit le CSV en
+    # parallèle et applique les filtres pendant le scan, seules les lignes
+    # retenues sont matérialisées en DataFrame
     print("   Chargement du fichier CSV (38 MB)...")
-    df_raw = pd.read_csv(data_file, delimiter=';', dtype={'GEO': str})
-
-    print(f"   Total lignes : {len(df_raw):,}")
-
-    # Filtrer sur les communes uniquement
-    df_communes = df_raw[df_raw['GEO_OBJECT'] == 'COM'].copy()
-    print(f"   Lignes communales : {len(df_communes):,}")
-
-    # Filtrer sur salaire moyen total (SEX='_T', AGE='_T')
-    df_filtered = df_communes[
-        (df_communes['SEX'] == '_T') &
-        (df_communes['AGE'] == '_T') &
-        (df_communes['CONF_STATUS'] == 'F')  # Uniquement données diffusables
-    ].copy()
-
-    print(f"   Lignes après filtres : {len(df_filtered):,}")
-
-    # Nettoyer le code INSEE (padding avec 0 si besoin)
-    df_filtered['code_insee'] = df_filtered['GEO'].str.zfill(5)
-
-    # Garder uniquement les colonnes utiles
-    df_result = df_filtered[['code_insee', 'OBS_VALUE', 'TIME_PERIOD']].copy()
-    df_result.rename(columns={
-        'OBS_VALUE': 'salaire_net_moyen',
-        'TIME_PERIOD': 'annee'
-    }, inplace=True)
+    df_result = (
+        duckdb.read_csv(str(data_file), delimiter=';', dtype={'GEO': 'VARCHAR'})
+        # Communes uniquement, salaire moyen total (SEX='_T', AGE='_T'), données diffusables
+        .filter("GEO_OBJECT = 'COM' AND SEX = '_T' AND AGE = '_T' AND CONF_STATUS = 'F'")
+        .project("""
+            CASE WHEN length(GEO) < 5 THEN lpad(GEO, 5, '0') ELSE GEO END AS code_insee,
+            OBS_VALUE AS salaire_net_moyen,
+            TIME_PERIOD AS annee
+        """)
+        .df()
+    )
+
+    print(f"   Lignes après filtres : {len(df_result):,}")
 
     # Joindre avec noms de communes
     communes_file = OUTPUT_DIR / "communes_population_all.parquet"
     if communes_file.exists():
-        df_communes_ref = pd.read_parquet(communes_file)
-        df_result = df_result.merge(
-            df_communes_ref[['code_insee', 'nom_commune']],
-            on='code_insee',
-            how='left'
-        )
+        # Lecture des seules colonnes utiles, jointure sur l'index code_insee
+        noms_communes = pd.read_parquet(
+            communes_file, columns=['code_insee', 'nom_commune']
+        ).set_index('code_insee')['nom_commune']
+        df_result = df_result.join(noms_communes, on='code_insee')
         print(f"✅ {df_result['nom_commune'].notna().sum():,} communes jointes avec noms")
     else:
         df_result['nom_commune'] = None
@@ -174,6 +160,10 @@ def save_data(df: pd.DataFrame, filename: str):
 if __name__ == "__main__":
     import argparse
 
+    print("=" * 80)
+    print("📊 TOURISMIQ - COLLECTEUR INSEE MELODI")
+    print("=" * 80)
+
     parser = argparse.ArgumentParser(description="Collecteur INSEE Melodi")
     parser.add_argument("--limit", type=int, default=None, help="Nombre de communes à collecter (par défaut: toutes)")
     parser.add_argument("--output", type=str, default="insee_melodi_communes.parquet", help="Fichier de sortie")
@@ -12,12 +12,19 @@ Usage:
 """
 
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, List, Dict
 from datetime import datetime
 
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import requests
 import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from tqdm import tqdm
 
 # Setup logging
@@ -33,37 +40,100 @@ class OpendatasoftCollector:
 
     BASE_URL = "https://public.opendatasoft.com/api/explore/v2.1/catalog/datasets"
     DATASET_ID = "population-francaise-communes"
+    MAX_WORKERS = 16  # Pages téléchargées en parallèle (partagent le pool de la session)
+    FLUSH_ROWS = 10_000  # Communes accumulées avant conversion en RecordBatch Arrow
+
+    # Champs conservés de l'API, typés explicitement (nom API -> type Arrow) :
+    # les populations tiennent en int32, les superficies en float32
+    SCHEMA = pa.schema([
+        ("code_insee", pa.string()),
+        ("nom_de_la_commune", pa.string()),
+        ("population_municipale", pa.int32()),
+        ("superficie", pa.float32()),
+        ("code_region", pa.string()),
+        ("nom_de_la_region", pa.string()),
+        ("code_departement", pa.string()),
+        ("annee_recensement", pa.string()),
+    ])
+
+    # Renommage des colonnes à la sauvegarde
+    COLUMNS_MAP = {
+        "code_insee": "code_insee",
+        "nom_de_la_commune": "nom_commune",
+        "population_municipale": "population",
+        "superficie": "superficie_km2",
+        "code_region": "code_region",
+        "nom_de_la_region": "nom_region",
+        "code_departement": "code_departement",
+        "annee_recensement": "annee_recensement"
+    }
+
+    # Colonnes à faible cardinalité (régions, départements) stockées en dictionnaire (category)
+    CATEGORY_COLUMNS = ["code_region", "nom_region", "code_departement"]
 
     def __init__(self):
-        self.communes = []
+        # Les communes sont stockées en colonnes Arrow, pas en liste de dicts
+        self.batches: List[pa.RecordBatch] = []
+        self._pending: List[Dict] = []
         self.stats = {
             "total_collected": 0,
             "api_calls": 0,
             "errors": 0,
             "start_time": datetime.now()
         }
+        self._stats_lock = threading.Lock()  # _make_request est appelé depuis plusieurs threads
+
+        # Session HTTP persistante (keep-alive) : les connexions TLS sont réutilisées
+        # d'une requête à l'autre, les erreurs transitoires sont réessayées par urllib3
+        self.session = requests.Session()
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET"],
+            raise_on_status=False
+        )
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=self.MAX_WORKERS, max_retries=retry))
+
+    def close(self):
+        """Ferme la session HTTP"""
+        self.session.close()
+
+    def _count(self, key: str):
+        """Incrémente un compteur de stats (thread-safe)"""
+        with self._stats_lock:
+            self.stats[key] += 1
 
     def _make_request(self, params: Dict) -> Optional[Dict]:
         """Fait une requête à l'API Opendatasoft"""
         url = f"{self.BASE_URL}/{self.DATASET_ID}/records"
 
         try:
-            self.stats["api_calls"] += 1
-            response = requests.get(url, params=params, timeout=30)
+            self._count("api_calls")
+            response = self.session.get(url, params=params, timeout=30)
 
             if response.status_code == 200:
                 return response.json()
             else:
                 logger.error(f"HTTP {response.status_code}: {response.text[:200]}")
-                self.stats["errors"] += 1
+                self._count("errors")
                 return None
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Request failed: {str(e)}")
-            self.stats["errors"] += 1
+            self._count("errors")
             return None
 
-    def collect_all_communes(self, limit: Optional[int] = None) -> List[Dict]:
+    def _fetch_page(self, offset: int, page_size: int) -> Optional[List[Dict]]:
+        """Récupère une page de communes (None si la réponse est invalide)"""
+        response = self._make_request({"limit": page_size, "offset": offset})
+
+        if not response or "results" not in response:
+            return None
+
+        return response["results"]
+
+    def collect_all_communes(self, limit: Optional[int] = None) -> int:
         """
         Collecte toutes les communes avec leur population
 
@@ -71,13 +141,12 @@ class OpendatasoftCollector:
             limit: Limite optionnelle du nombre de communes
 
         Returns:
-            Liste de communes avec données démographiques
+            Nombre de communes collectées
         """
         logger.info("🏘️  Starting Opendatasoft population collection")
 
         # Paramètres de base
         batch_size = 100  # Taille de page
-        offset = 0
         total = None
 
         # Première requête pour connaître le total
@@ -97,96 +166,108 @@ class OpendatasoftCollector:
 
         if not total:
             logger.error("Failed to get total count")
-            return []
-
-        # Barre de progression
-        pbar = tqdm(total=total, desc="Collecting communes")
-
-        # Collecter par batches
-        while len(self.communes) < total:
-            params = {
-                "limit": batch_size,
-                "offset": offset
-            }
+            return 0
 
-            response = self._make_request(params)
+        # Les offsets sont connus dès que le total l'est : les pages sont téléchargées
+        # en parallèle et consommées dans l'ordre (map préserve l'ordre des offsets)
+        offsets = range(0, total, batch_size)
+        page_sizes = [min(batch_size, total - offset) for offset in offsets]
 
-            if not response or "results" not in response:
-                logger.error(f"Invalid response at offset {offset}")
-                break
-
-            batch = response["results"]
-
-            if not batch:
-                logger.info("No more communes")
-                break
-
-            # Ajouter à la collection
-            self.communes.extend(batch)
-            self.stats["total_collected"] = len(self.communes)
-
-            pbar.update(len(batch))
-            offset += batch_size
+        pbar = tqdm(total=total, desc="Collecting communes")
+        executor = ThreadPoolExecutor(max_workers=self.MAX_WORKERS)
 
-            # Respect de l'API (pas de rate limit strict, mais soyons gentils)
-            # time.sleep(0.05)
+        try:
+            for offset, batch in zip(offsets, executor.map(self._fetch_page, offsets, page_sizes)):
+                if batch is None:
+                    logger.error(f"Invalid response at offset {offset}")
+                    break
+
+                if not batch:
+                    logger.info("No more communes")
+                    break
+
+                # Ajouter à la collection
+                self._pending.extend(batch)
+                if len(self._pending) >= self.FLUSH_ROWS:
+                    self._flush()
+                self.stats["total_collected"] += len(batch)
+
+                pbar.update(len(batch))
+        finally:
+            # En cas d'arrêt anticipé, les pages pas encore lancées sont abandonnées
+            executor.shutdown(wait=True, cancel_futures=True)
+            pbar.close()
+            self._flush()
+
+        logger.info(f"✅ Collection complete: {self.stats['total_collected']:,} communes")
+        return self.stats["total_collected"]
+
+    def _flush(self):
+        """Convertit les communes en attente en RecordBatch Arrow (seuls les champs du schéma sont gardés)"""
+        if not self._pending:
+            return
 
-        pbar.close()
+        arrays = [
+            self._to_arrow([record.get(field.name) for record in self._pending], field.type)
+            for field in self.SCHEMA
+        ]
+        self.batches.append(pa.RecordBatch.from_arrays(arrays, schema=self.SCHEMA))
+        self._pending = []
 
-        logger.info(f"✅ Collection complete: {len(self.communes):,} communes")
-        return self.communes
+    @staticmethod
+    def _to_arrow(values: List, arrow_type: pa.DataType) -> pa.Array:
+        """Convertit une colonne en tableau Arrow, les valeurs non convertibles deviennent nulles"""
+        try:
+            return pa.array(values, type=arrow_type, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+            if pa.types.is_string(arrow_type):
+                return pa.array([None if v is None else str(v) for v in values], type=arrow_type)
+            numbers = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce")
+            if pa.types.is_integer(arrow_type):
+                # Les valeurs décimales ne sont pas tronquées silencieusement
+                numbers = numbers.where(numbers == numbers.round())
+            return pa.array(numbers, type=arrow_type, from_pandas=True)
 
     def save_to_parquet(self, output_path: str):
         """Sauvegarde les données en Parquet"""
-        if not self.communes:
+        if not self.batches:
             logger.warning("No data to save")
             return
 
-        # Convertir en DataFrame
-        df = pd.DataFrame(self.communes)
-
-        logger.info(f"Columns available: {list(df.columns)}")
-
-        # Sélectionner et renommer les colonnes utiles
-        columns_map = {
-            "code_insee": "code_insee",
-            "nom_de_la_commune": "nom_commune",
-            "population_municipale": "population",
-            "superficie": "superficie_km2",
-            "code_region": "code_region",
-            "nom_de_la_region": "nom_region",
-            "code_departement": "code_departement",
-            "annee_recensement": "annee_recensement"
-        }
-
-        # Garder seulement les colonnes qui existent
-        available_cols = {k: v for k, v in columns_map.items() if k in df.columns}
-
-        df_clean = df[list(available_cols.keys())].rename(columns=available_cols)
-
-        # Convertir les types
-        if "population" in df_clean.columns:
-            df_clean["population"] = pd.to_numeric(df_clean["population"], errors="coerce")
+        table = pa.Table.from_batches(self.batches, schema=self.SCHEMA)
 
-        if "superficie_km2" in df_clean.columns:
-            df_clean["superficie_km2"] = pd.to_numeric(df_clean["superficie_km2"], errors="coerce")
+        # Garder seulement les colonnes renseignées par l'API, puis renommer
+        available_cols = [name for name in table.column_names if table[name].null_count < table.num_rows]
+        logger.info(f"Columns available: {available_cols}")
+        table = table.select(available_cols).rename_columns([self.COLUMNS_MAP[name] for name in available_cols])
 
         # Calculer densité si population et superficie disponibles
-        if "population" in df_clean.columns and "superficie_km2" in df_clean.columns:
-            df_clean["densite_hab_km2"] = (
-                df_clean["population"] / df_clean["superficie_km2"]
-            ).round(2)
+        if "population" in table.column_names and "superficie_km2" in table.column_names:
+            densite = pc.round(pc.divide(pc.cast(table["population"], pa.float32()), table["superficie_km2"]), 2)
+            table = table.append_column("densite_hab_km2", densite)
+
+        for name in self.CATEGORY_COLUMNS:
+            if name in table.column_names:
+                index = table.column_names.index(name)
+                table = table.set_column(index, name, pc.dictionary_encode(table[name]))
 
         # Créer le dossier de sortie
         output_file = Path(output_path)
         output_file.parent.mkdir(parents=True, exist_ok=True)
 
-        # Sauvegarder
-        df_clean.to_parquet(output_file, index=False, compression="snappy")
-
-        logger.info(f"✅ Saved {len(df_clean):,} communes to {output_path}")
+        # Sauvegarder (écriture directe depuis Arrow, sans passer par un DataFrame)
+        pq.write_table(
+            table,
+            output_file,
+            compression="zstd",
+            compression_level=3,
+            use_dictionary=self.CATEGORY_COLUMNS + ["nom_commune"],
+            row_group_size=64 * 1024
+        )
+
+        logger.info(f"✅ Saved {table.num_rows:,} communes to {output_path}")
         logger.info(f"   File size: {output_file.stat().st_size / 1024 / 1024:.2f} MB")
-        logger.info(f"   Columns: {list(df_clean.columns)}")
+        logger.info(f"   Columns: {table.column_names}")
 
         # Stats finales
         duration = (datetime.now() - self.stats["start_time"]).total_seconds()
@@ -197,11 +278,15 @@ class OpendatasoftCollector:
         logger.info(f"   - Duration: {duration:.1f}s")
 
         # Stats démographiques
+        if "population" not in table.column_names:
+            return
+
         logger.info(f"\n📈 Population Stats:")
-        logger.info(f"   - Total population: {df_clean['population'].sum():,.0f}")
-        logger.info(f"   - Avg population: {df_clean['population'].mean():.0f}")
+        logger.info(f"   - Total population: {pc.sum(table['population']).as_py() or 0:,.0f}")
+        logger.info(f"   - Avg population: {pc.mean(table['population']).as_py() or 0:.0f}")
         logger.info(f"   - Top 5 communes by population:")
-        for idx, row in df_clean.nlargest(5, "population").iterrows():
+        top = table.sort_by([("population", "descending")]).slice(0, 5)
+        for row in top.select(["nom_commune", "population"]).to_pylist():
             logger.info(f"     • {row['nom_commune']}: {row['population']:,.0f} habitants")
 
 
@@ -218,11 +303,14 @@ def main():
     # Créer le collector
     collector = OpendatasoftCollector()
 
-    # Collecter les données
-    collector.collect_all_communes(limit=args.limit)
+    try:
+        # Collecter les données
+        collector.collect_all_communes(limit=args.limit)
 
-    # Sauvegarder
-    collector.save_to_parquet(args.output)
+        # Sauvegarder
+        collector.save_to_parquet(args.output)
+    finally:
+        collector.close()
 
 
 if __name__ == "__main__":
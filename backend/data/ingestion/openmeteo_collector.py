@@ -16,12 +16,17 @@ Usage:
 """
 
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 
+import numpy as np
 import requests
 import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from tqdm import tqdm
 
 # Setup logging
@@ -66,6 +71,33 @@ class OpenMeteoCollector:
             "api_calls": 0,
             "errors": 0
         }
+        self._stats_lock = threading.Lock()  # _make_request est appelé depuis plusieurs threads
+
+        # Session HTTP persistante (keep-alive) : les connexions TLS sont réutilisées
+        # d'une requête à l'autre, les erreurs transitoires et les 429 d'Open-Meteo
+        # sont réessayés par urllib3 avec backoff
+        self.session = requests.Session()
+        retry = Retry(
+            total=5,
+            backoff_factor=1.0,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET"],
+            raise_on_status=False
+        )
+        # Un seul hôte : un pool, dimensionné pour les requêtes parallèles par région
+        self.session.mount(
+            "https://",
+            HTTPAdapter(pool_connections=1, pool_maxsize=len(self.REGIONAL_CITIES), max_retries=retry)
+        )
+
+    def close(self):
+        """Ferme la session HTTP"""
+        self.session.close()
+
+    def _count(self, key: str):
+        """Incrémente un compteur de stats (thread-safe)"""
+        with self._stats_lock:
+            self.stats[key] += 1
 
     def _make_request(self, lat: float, lon: float, start_date: str, end_date: str) -> Optional[Dict]:
         """
@@ -88,19 +120,19 @@ class OpenMeteoCollector:
         }
 
         try:
-            self.stats["api_calls"] += 1
-            response = requests.get(self.BASE_URL, params=params, timeout=30)
+            self._count("api_calls")
+            response = self.session.get(self.BASE_URL, params=params, timeout=30)
 
             if response.status_code == 200:
                 return response.json()
             else:
                 logger.error(f"HTTP {response.status_code}: {response.text[:200]}")
-                self.stats["errors"] += 1
+                self._count("errors")
                 return None
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Request failed: {str(e)}")
-            self.stats["errors"] += 1
+            self._count("errors")
             return None
 
     def collect_regional_climate(self, year: int = 2024) -> List[Dict]:
@@ -119,62 +151,67 @@ class OpenMeteoCollector:
         start_date = f"{year}-01-01"
         end_date = f"{year}-12-31"
 
-        pbar = tqdm(self.REGIONAL_CITIES.items(), desc="Collecting regions")
+        # Les requêtes par région sont indépendantes : elles partent toutes en parallèle
+        # sur la session partagée, le temps total est borné par la plus lente
+        regions = list(self.REGIONAL_CITIES.items())
+        pbar = tqdm(total=len(regions), desc="Collecting regions")
 
-        for region_name, city_info in pbar:
-            pbar.set_description(f"Collecting {city_info['name']}")
+        def fetch(city_info: Dict) -> Optional[Dict]:
+            data = self._make_request(city_info["lat"], city_info["lon"], start_date, end_date)
+            pbar.update(1)
+            return data
 
-            # Récupérer données météo annuelles
-            data = self._make_request(
-                city_info["lat"],
-                city_info["lon"],
-                start_date,
-                end_date
-            )
+        with ThreadPoolExecutor(max_workers=len(regions)) as executor:
+            responses = list(executor.map(fetch, [city_info for _, city_info in regions]))
+
+        pbar.close()
 
+        # Post-traitement séquentiel, dans l'ordre des régions
+        for (region_name, city_info), data in zip(regions, responses):
             if not data or "daily" not in data:
                 logger.warning(f"Failed to get data for {region_name}")
                 continue
 
-            daily = data["daily"]
-
-            # Calculer statistiques annuelles
-            temps_max = daily["temperature_2m_max"]
-            temps_min = daily["temperature_2m_min"]
-            precip = daily["precipitation_sum"]
-            sunshine = daily["sunshine_duration"]
-
-            climate_stats = {
-                "region": region_name,
-                "city": city_info["name"],
-                "latitude": city_info["lat"],
-                "longitude": city_info["lon"],
-                "year": year,
-                # Températures
-                "temp_avg_annual": round((sum(temps_max) + sum(temps_min)) / (2 * len(temps_max)), 1),
-                "temp_max_summer": round(max(temps_max[151:243]), 1),  # Juin-Août
-                "temp_min_winter": round(min(temps_min[0:90] + temps_min[335:]), 1),  # Déc-Fév
-                # Précipitations
-                "precipitation_annual_mm": round(sum(precip), 1),
-                "precipitation_winter_mm": round(sum(precip[0:90] + precip[335:]), 1),
-                # Ensoleillement
-                "sunshine_annual_hours": round(sum(sunshine) / 3600, 0),  # Convertir secondes en heures
-                # Classification climatique simple
-                "climate_type": self._classify_climate(
-                    sum(temps_max) / len(temps_max),
-                    sum(precip),
-                    sum(sunshine) / 3600
-                )
-            }
-
-            self.climate_data.append(climate_stats)
+            self.climate_data.append(self._compute_climate_stats(region_name, city_info, year, data["daily"]))
             self.stats["regions_collected"] += 1
 
-        pbar.close()
-
         logger.info(f"✅ Collected climate data for {len(self.climate_data)} regions")
         return self.climate_data
 
+    def _compute_climate_stats(self, region_name: str, city_info: Dict, year: int, daily: Dict) -> Dict:
+        """Calcule les statistiques climatiques annuelles d'une région à partir des données journalières"""
+        # Calculer statistiques annuelles (réductions NumPy sur les séries journalières)
+        temps_max = np.asarray(daily["temperature_2m_max"], dtype=np.float64)
+        temps_min = np.asarray(daily["temperature_2m_min"], dtype=np.float64)
+        precip = np.asarray(daily["precipitation_sum"], dtype=np.float64)
+        sunshine = np.asarray(daily["sunshine_duration"], dtype=np.float64)
+
+        precip_total = float(precip.sum())
+        sunshine_hours = float(sunshine.sum()) / 3600  # Convertir secondes en heures
+
+        return {
+            "region": region_name,
+            "city": city_info["name"],
+            "latitude": city_info["lat"],
+            "longitude": city_info["lon"],
+            "year": year,
+            # Températures
+            "temp_avg_annual": round(float(temps_max.sum() + temps_min.sum()) / (2 * temps_max.size), 1),
+            "temp_max_summer": round(float(temps_max[151:243].max()), 1),  # Juin-Août
+            "temp_min_winter": round(float(min(temps_min[:90].min(), temps_min[335:].min(initial=np.inf))), 1),  # Déc-Fév
+            # Précipitations
+            "precipitation_annual_mm": round(precip_total, 1),
+            "precipitation_winter_mm": round(float(precip[:90].sum() + precip[335:].sum()), 1),
+            # Ensoleillement
+            "sunshine_annual_hours": round(sunshine_hours, 0),
+            # Classification climatique simple
+            "climate_type": self._classify_climate(
+                float(temps_max.mean()),
+                precip_total,
+                sunshine_hours
+            )
+        }
+
     def _classify_climate(self, temp_avg: float, precip_total: float, sunshine_hours: float) -> str:
         """
         Classification climatique simplifiée pour ML
@@ -204,7 +241,14 @@ class OpenMeteoCollector:
         output_file.parent.mkdir(parents=True, exist_ok=True)
 
         # Sauvegarder
-        df.to_parquet(output_file, index=False, compression="snappy")
+        df.to_parquet(
+            output_file,
+            index=False,
+            engine="pyarrow",
+            compression="zstd",
+            compression_level=3,
+            use_dictionary=["region", "climate_type"]
+        )
 
         logger.info(f"✅ Saved climate data to {output_path}")
         logger.info(f"   Regions: {len(df)}")
@@ -237,11 +281,14 @@ def main():
     # Créer le collector
     collector = OpenMeteoCollector()
 
-    # Collecter les données
-    collector.collect_regional_climate(year=args.year)
+    try:
+        # Collecter les données
+        collector.collect_regional_climate(year=args.year)
 
-    # Sauvegarder
-    collector.save_to_parquet(args.output)
+        # Sauvegarder
+        collector.save_to_parquet(args.output)
+    finally:
+        collector.close()
 
 
 if __name__ == "__main__":
@@ -18,6 +18,7 @@ Author: Nicolas Angougeard
 
 import os
 import json
+import functools
 import joblib
 from pathlib import Path
 from typing import Dict, List, Optional, Union, Any
@@ -26,8 +27,17 @@ import numpy as np
 import pandas as pd
 from datetime import datetime
 
+# Model loader, bound once at import (replaced in tests)
+_load = joblib.load
 
-@dataclass
+
+@functools.lru_cache(maxsize=4)
+def _cached_load(path: str, mtime: float) -> Any:
+    """Load a model once per (path, modification time) in this process."""
+    return _load(path)
+
+
+@dataclass(slots=True)
 class POIScoringResult:
     """Result container for POI quality scoring."""
 
@@ -49,6 +59,26 @@ class POIScoringResult:
             "model_version": self.model_version
         }
 
+    @staticmethod
+    def to_dict_batch(results: List["POIScoringResult"]) -> List[Dict[str, Any]]:
+        """Convert a list of results to dictionaries."""
+        return [result.to_dict() for result in results]
+
+
+def _value_or(value: Any, default: float) -> Any:
+    """Return value, or default when it is missing (None)."""
+    return default if value is None else value
+
+
+def _days_since_update(updated_at: Any, now: pd.Timestamp) -> float:
+    """Days elapsed since the last update (365 when unknown or unparsable)."""
+    if not updated_at:
+        return 365.0
+    try:
+        return float((now - pd.to_datetime(updated_at)).days)
+    except Exception:
+        return 365.0
+
 
 class POIQualityScorer:
     """
@@ -73,7 +103,7 @@ class POIQualityScorer:
         >>> print(f"Quality Score: {result.quality_score}/100")
     """
 
-    REQUIRED_FEATURES = [
+    REQUIRED_FEATURES = (
         # Completeness features
         "has_name",
         "has_description",
@@ -98,12 +128,21 @@ class POIQualityScorer:
         # Freshness
         "days_since_update",
         "is_recent"
-    ]
+    )
+
+    # Column of each feature in the feature vectors
+    _FEATURE_INDEX = {name: i for i, name in enumerate(REQUIRED_FEATURES)}
+
+    # Columns averaged into the prediction confidence
+    _COMPLETENESS_IDX = list(map(_FEATURE_INDEX.__getitem__, (
+        "has_name", "has_description", "has_gps", "has_address", "has_images"
+    )))
 
     def __init__(
         self,
         model_path: Optional[Path] = None,
-        metrics_path: Optional[Path] = None
+        metrics_path: Optional[Path] = None,
+        load_model: bool = True
     ):
         """
         Initialize the POI Quality Scorer.
@@ -111,6 +150,8 @@ class POIQualityScorer:
         Args:
             model_path: Path to the trained model file (.pkl)
             metrics_path: Path to model metrics JSON file
+            load_model: Whether to load the model; without it only feature
+                extraction is available
         """
         if model_path is None:
             # Default path relative to this file
@@ -121,13 +162,24 @@ class POIQualityScorer:
         self.model_path = Path(model_path)
         self.metrics_path = Path(metrics_path) if metrics_path else None
 
-        # Load model and metadata
-        self.model = self._load_model()
-        self.metrics = self._load_metrics()
-        self.model_version = self._get_model_version()
+        if load_model:
+            # Load model and metadata
+            self.model = self._load_model()
+            self.metrics = self._load_metrics()
+            self.model_version = self._get_model_version()
+        else:
+            self.model = None
+            self.metrics = None
+            self.model_version = None
 
-        # Feature importance (if available)
+        # Feature importance (if available), sorted once since the model never changes
         self.feature_importance = self._extract_feature_importance()
+        self._sorted_importance = sorted(
+            (self.feature_importance or {}).items(),
+            key=lambda x: x[1],
+            reverse=True
+        )
+        self._model_info: Optional[Dict[str, Any]] = None
 
     def _load_model(self) -> Any:
         """Load the trained model from disk."""
@@ -138,11 +190,16 @@ class POIQualityScorer:
             )
 
         try:
-            model = joblib.load(self.model_path)
+            model = _cached_load(str(self.model_path), self.model_path.stat().st_mtime)
             return model
         except Exception as e:
             raise RuntimeError(f"Failed to load model: {e}")
 
+    @staticmethod
+    def clear_cache() -> None:
+        """Drop the models cached by previous scorer constructions."""
+        _cached_load.cache_clear()
+
     def _load_metrics(self) -> Optional[Dict[str, float]]:
         """Load model performance metrics."""
         if self.metrics_path and self.metrics_path.exists():
@@ -169,77 +226,99 @@ class POIQualityScorer:
             pass
         return None
 
-    def extract_features(self, poi_data: Dict[str, Any]) -> Dict[str, float]:
+    def extract_features_batch(self, pois: List[Dict[str, Any]]) -> np.ndarray:
         """
-        Extract ML features from raw POI data.
+        Extract ML features for a batch of POIs.
+
+        Each feature is built as one NumPy column over the whole batch
+        (``np.fromiter`` with a known length), then the columns are stacked
+        in ``REQUIRED_FEATURES`` order.
 
         Args:
-            poi_data: Dictionary containing POI information
+            pois: List of POI dictionaries
 
         Returns:
-            Dictionary of engineered features
-
-        Raises:
-            ValueError: If required fields are missing
+            Array of shape (len(pois), len(REQUIRED_FEATURES))
         """
-        features = {}
+        def column(func) -> np.ndarray:
+            return np.fromiter((func(poi) for poi in pois), dtype=np.float64, count=len(pois))
+
+        now = pd.Timestamp.now()
+        columns = {}
 
         # Completeness features (binary)
-        features["has_name"] = float(bool(poi_data.get("name")))
-        features["has_description"] = float(bool(poi_data.get("description")))
-        features["has_gps"] = float(
-            poi_data.get("latitude") is not None and
-            poi_data.get("longitude") is not None
-        )
-        features["has_address"] = float(bool(poi_data.get("address")))
-        features["has_images"] = float(
-            poi_data.get("num_images", 0) > 0 or
-            bool(poi_data.get("images"))
+        latitude = column(lambda poi: _value_or(poi.get("latitude"), np.nan))
+        longitude = column(lambda poi: _value_or(poi.get("longitude"), np.nan))
+        columns["has_name"] = column(lambda poi: bool(poi.get("name")))
+        columns["has_description"] = column(lambda poi: bool(poi.get("description")))
+        columns["has_gps"] = (~np.isnan(latitude) & ~np.isnan(longitude)).astype(np.float64)
+        columns["has_address"] = column(lambda poi: bool(poi.get("address")))
+        columns["has_images"] = column(
+            lambda poi: (poi.get("num_images") or 0) > 0 or bool(poi.get("images"))
         )
-        features["has_opening_hours"] = float(bool(poi_data.get("opening_hours")))
-        features["has_contact"] = float(
-            bool(poi_data.get("phone")) or
-            bool(poi_data.get("email"))
+        columns["has_opening_hours"] = column(lambda poi: bool(poi.get("opening_hours")))
+        columns["has_contact"] = column(
+            lambda poi: bool(poi.get("phone")) or bool(poi.get("email"))
         )
 
         # Richness features (continuous)
-        description = poi_data.get("description", "")
-        features["description_length"] = float(len(description))
-        features["num_images"] = float(poi_data.get("num_images", 0))
-        features["has_website"] = float(bool(poi_data.get("website")))
+        columns["description_length"] = column(lambda poi: len(poi.get("description") or ""))
+        columns["num_images"] = column(lambda poi: poi.get("num_images") or 0)
+        columns["has_website"] = column(lambda poi: bool(poi.get("website")))
 
-        # Geographic features
-        features["latitude"] = float(poi_data.get("latitude", 0.0))
-        features["longitude"] = float(poi_data.get("longitude", 0.0))
+        # Geographic features (missing coordinates default to 0.0)
+        columns["latitude"] = np.nan_to_num(latitude, nan=0.0)
+        columns["longitude"] = np.nan_to_num(longitude, nan=0.0)
 
         # Context features (external data)
-        features["insee_salary_median"] = float(
-            poi_data.get("insee_salary_median", 2000.0)
+        columns["insee_salary_median"] = column(
+            lambda poi: _value_or(poi.get("insee_salary_median"), 2000.0)
         )
-        features["population"] = float(poi_data.get("population", 10000))
-        features["poi_density_10km"] = float(poi_data.get("poi_density_10km", 50))
+        columns["population"] = column(lambda poi: _value_or(poi.get("population"), 10000))
+        columns["poi_density_10km"] = column(lambda poi: _value_or(poi.get("poi_density_10km"), 50))
 
         # Freshness features
-        updated_at = poi_data.get("updated_at")
-        if updated_at:
-            try:
-                update_date = pd.to_datetime(updated_at)
-                days_since = (pd.Timestamp.now() - update_date).days
-                features["days_since_update"] = float(days_since)
-                features["is_recent"] = float(days_since <= 180)  # 6 months
-            except Exception:
-                features["days_since_update"] = 365.0
-                features["is_recent"] = 0.0
-        else:
-            features["days_since_update"] = 365.0
-            features["is_recent"] = 0.0
+        columns["days_since_update"] = column(
+            lambda poi: _days_since_update(poi.get("updated_at"), now)
+        )
+        columns["is_recent"] = (columns["days_since_update"] <= 180).astype(np.float64)  # 6 months
+
+        return np.column_stack([columns[feat] for feat in self.REQUIRED_FEATURES])
 
-        return features
+    def extract_features(self, poi_data: Dict[str, Any]) -> np.ndarray:
+        """
+        Extract ML features from raw POI data.
+
+        Args:
+            poi_data: Dictionary containing POI information
+
+        Returns:
+            Feature vector in REQUIRED_FEATURES order
+        """
+        return self.extract_features_batch([poi_data])[0]
+
+    def extract_features_dict(self, poi_data: Dict[str, Any]) -> Dict[str, float]:
+        """
+        Extract ML features from raw POI data, keyed by feature name.
+
+        Args:
+            poi_data: Dictionary containing POI information
+
+        Returns:
+            Dictionary of engineered features
+        """
+        return dict(zip(self.REQUIRED_FEATURES, self.extract_features(poi_data).tolist()))
+
+    def _confidence(self, feature_matrix: np.ndarray) -> np.ndarray:
+        """Confidence of each prediction, based on feature completeness (0.5-0.95)."""
+        completeness = feature_matrix[:, self._COMPLETENESS_IDX].mean(axis=1)
+        return np.minimum(0.95, 0.5 + completeness * 0.5)
 
     def score_poi(
         self,
         poi_data: Dict[str, Any],
-        return_features: bool = False
+        return_features: bool = False,
+        out: Optional[POIScoringResult] = None
     ) -> POIScoringResult:
         """
         Score a single POI's quality.
@@ -247,54 +326,76 @@ class POIQualityScorer:
         Args:
             poi_data: Dictionary containing POI information
             return_features: Whether to include features in the result
+            out: Existing result to overwrite instead of creating a new one
 
         Returns:
             POIScoringResult with quality score and metadata
         """
-        # Extract features
-        features = self.extract_features(poi_data)
-
-        # Create feature vector in correct order
-        feature_vector = np.array([
-            features[feat] for feat in self.REQUIRED_FEATURES
-        ]).reshape(1, -1)
-
-        # Predict quality score
-        quality_score = float(self.model.predict(feature_vector)[0])
-
-        # Calculate confidence (based on feature completeness)
-        completeness_features = [
-            "has_name", "has_description", "has_gps",
-            "has_address", "has_images"
-        ]
-        completeness = sum(features[f] for f in completeness_features) / len(completeness_features)
-        confidence = min(0.95, 0.5 + completeness * 0.5)  # Scale to 0.5-0.95
-
-        return POIScoringResult(
-            poi_id=poi_data.get("id", "unknown"),
-            quality_score=quality_score,
-            confidence=confidence,
-            features=features if return_features else {},
-            timestamp=datetime.now().isoformat(),
-            model_version=self.model_version
-        )
+        return self.score_batch(
+            [poi_data], return_features, out=None if out is None else [out]
+        )[0]
 
     def score_batch(
         self,
         pois: List[Dict[str, Any]],
-        return_features: bool = False
+        return_features: bool = False,
+        out: Optional[List[POIScoringResult]] = None
     ) -> List[POIScoringResult]:
         """
         Score multiple POIs efficiently.
 
+        Features are extracted into one matrix and the model is called once
+        for the whole batch.
+
         Args:
             pois: List of POI dictionaries
             return_features: Whether to include features in results
+            out: Existing results (one per POI) to overwrite in place, so that
+                repeated batch scoring creates no new POIScoringResult objects
+                (feature dicts are still built when return_features is set)
 
         Returns:
-            List of POIScoringResult objects
+            List of POIScoringResult objects (``out`` when given)
         """
-        return [self.score_poi(poi, return_features) for poi in pois]
+        if self.model is None:
+            raise RuntimeError("No model loaded: scorer was created with load_model=False")
+
+        if out is not None and len(out) != len(pois):
+            raise ValueError(f"out holds {len(out)} results for {len(pois)} POIs")
+
+        if not pois:
+            return [] if out is None else out
+
+        feature_matrix = self.extract_features_batch(pois)
+        quality_scores = self.model.predict(feature_matrix)
+        confidences = self._confidence(feature_matrix)
+        timestamp = datetime.now().isoformat()
+
+        results = []
+        for i, (poi, row, quality_score, confidence) in enumerate(
+            zip(pois, feature_matrix, quality_scores, confidences)
+        ):
+            poi_id = poi.get("id", "unknown")
+            features = dict(zip(self.REQUIRED_FEATURES, row.tolist())) if return_features else {}
+            if out is None:
+                results.append(POIScoringResult(
+                    poi_id=poi_id,
+                    quality_score=float(quality_score),
+                    confidence=float(confidence),
+                    features=features,
+                    timestamp=timestamp,
+                    model_version=self.model_version
+                ))
+            else:
+                result = out[i]
+                result.poi_id = poi_id
+                result.quality_score = float(quality_score)
+                result.confidence = float(confidence)
+                result.features = features
+                result.timestamp = timestamp
+                result.model_version = self.model_version
+
+        return results if out is None else out
 
     def get_feature_importance(self, top_n: int = 10) -> Dict[str, float]:
         """
@@ -306,33 +407,28 @@ class POIQualityScorer:
         Returns:
             Dictionary of feature names and their importance scores
         """
-        if not self.feature_importance:
-            return {}
-
-        sorted_features = sorted(
-            self.feature_importance.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )
-        return dict(sorted_features[:top_n])
+        return dict(self._sorted_importance[:top_n])
 
     def get_model_info(self) -> Dict[str, Any]:
         """Get comprehensive model information."""
-        info = {
-            "model_type": type(self.model).__name__,
-            "model_version": self.model_version,
-            "model_path": str(self.model_path),
-            "num_features": len(self.REQUIRED_FEATURES),
-            "features": self.REQUIRED_FEATURES,
-        }
+        if self._model_info is None:
+            info = {
+                "model_type": type(self.model).__name__,
+                "model_version": self.model_version,
+                "model_path": str(self.model_path),
+                "num_features": len(self.REQUIRED_FEATURES),
+                "features": list(self.REQUIRED_FEATURES),
+            }
+
+            if self.metrics:
+                info["performance"] = self.metrics
 
-        if self.metrics:
-            info["performance"] = self.metrics
+            if self.feature_importance:
+                info["top_features"] = self.get_feature_importance(5)
 
-        if self.feature_importance:
-            info["top_features"] = self.get_feature_importance(5)
+            self._model_info = info
 
-        return info
+        return dict(self._model_info)
 
     def __repr__(self) -> str:
         return (
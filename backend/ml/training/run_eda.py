@@ -7,7 +7,10 @@ Exploration rapide des données collectées
 
 import pandas as pd
 import numpy as np
-import json
+import orjson
+import polars as pl
+from joblib import Parallel, cpu_count, delayed
+from functools import partial
 from pathlib import Path
 from collections import Counter
 
@@ -41,6 +44,20 @@ print("\nChargement climat...")
 df_climate = pd.read_parquet(climate_file)
 print(f"✅ {len(df_climate)} régions chargées")
 
+# Masques des valeurs renseignées, calculés une seule fois par colonne et réutilisés
+# par les rapports de complétude et les features
+notna_masks = {}
+
+def notna_mask(col):
+    if col not in notna_masks:
+        notna_masks[col] = df_pois[col].notna().to_numpy()
+    return notna_masks[col]
+
+def set_column(col, values):
+    # Toute réaffectation invalide le masque en cache de la colonne
+    df_pois[col] = values
+    notna_masks.pop(col, None)
+
 # ============================================================================
 # 2. STRUCTURE DES POIS
 # ============================================================================
@@ -50,7 +67,7 @@ print(f"Shape: {df_pois.shape}")
 print(f"\nColonnes disponibles ({len(df_pois.columns)}):")
 for i, col in enumerate(df_pois.columns[:20], 1):  # Premiers 20
     dtype = df_pois[col].dtype
-    non_null = df_pois[col].notna().sum()
+    non_null = notna_mask(col).sum()
     pct = non_null / len(df_pois) * 100
     print(f"  {i:2d}. {col:30s} - {str(dtype):10s} - {pct:5.1f}% rempli")
 
@@ -71,7 +88,7 @@ key_fields = [
 completeness = {}
 for field in key_fields:
     if field in df_pois.columns:
-        non_null = df_pois[field].notna().sum()
+        non_null = notna_mask(field).sum()
         pct = non_null / len(df_pois) * 100
         completeness[field] = pct
         status = "✅" if pct > 80 else "⚠️" if pct > 50 else "❌"
@@ -83,41 +100,91 @@ for field in key_fields:
 print("\n\n🔍 4. EXTRACTION DES CHAMPS CLÉS")
 print("-" * 80)
 
-# Helper: parser JSON
+# Helper: extraction parallèle (les extracteurs sont indépendants d'une ligne à l'autre)
+def _map_chunk(func, values):
+    return [func(value) for value in values]
+
+def parallel_chunks(func, values):
+    """Applique func à des blocs de valeurs répartis sur tous les cœurs (joblib)"""
+    chunks = np.array_split(values, cpu_count())
+    return Parallel(n_jobs=-1)(delayed(func)(chunk) for chunk in chunks)
+
+def parallel_map(func, values):
+    """Applique func à chaque valeur, par blocs répartis sur tous les cœurs (joblib)"""
+    results = parallel_chunks(partial(_map_chunk, func), values)
+    return [value for chunk in results for value in chunk]
+
+# Helper: parser JSON (orjson, appelé pour chaque ligne par les extracteurs ci-dessous)
 def parse_json(value):
-    if pd.isna(value):
+    if value is None or (isinstance(value, float) and value != value):
         return None
-    if isinstance(value, str):
+    if isinstance(value, (str, bytes)):
         try:
-            return json.loads(value)
-        except:
+            return orjson.loads(value)
+        except orjson.JSONDecodeError:
             return None
     return value
 
+# Colonnes JSON décodées, mémorisées pour qu'une colonne lue par plusieurs extracteurs
+# ne soit décodée qu'une fois
+parsed_columns = {}
+
+def parsed_column(col):
+    if col not in parsed_columns:
+        parsed_columns[col] = pd.Series(
+            parallel_map(parse_json, df_pois[col].to_numpy(dtype=object)), index=df_pois.index, dtype=object
+        )
+    return parsed_columns[col]
+
 # Extraire types
+GENERIC_TYPES = frozenset({'schema:Thing', 'schema:Place', 'olo:OrderedList'})
+
 def extract_main_type(type_val):
     type_val = parse_json(type_val)
     if not type_val or not isinstance(type_val, list):
         return None
     # Prendre le type le plus spécifique (dernier de la liste généralement)
     for t in reversed(type_val):
-        if t not in ['schema:Thing', 'schema:Place', 'olo:OrderedList']:
+        if t not in GENERIC_TYPES:
             return t
-    return type_val[0] if type_val else None
+    return type_val[0]
+
+def extract_main_types(parquet_file):
+    """
+    Type principal de chaque POI, même règle qu'extract_main_type : requête Polars
+    paresseuse, seule la colonne 'type' est lue puis décodée en vectoriel
+    """
+    types = pl.col('type').str.json_decode(pl.List(pl.Utf8))
+    specific = types.list.eval(pl.element().filter(~pl.element().is_in(list(GENERIC_TYPES)))).list.last()
+    return (
+        pl.scan_parquet(parquet_file)
+        .select(pl.coalesce(specific, types.list.first()).alias('type_principal'))
+        .collect()
+        .to_series()
+        .to_list()
+    )
 
 if 'type' in df_pois.columns:
     print("Extraction types de POIs...")
-    df_pois['type_principal'] = df_pois['type'].apply(extract_main_type)
-    print(f"✅ {df_pois['type_principal'].notna().sum():,} types extraits")
+    try:
+        main_types = extract_main_types(pois_file)
+    except pl.exceptions.ComputeError:
+        # JSON mal formé dans la colonne : repli sur l'extraction tolérante, ligne par ligne
+        main_types = parallel_map(extract_main_type, df_pois['type'].to_numpy(dtype=object))
+    set_column('type_principal', pd.Categorical(main_types))
+    print(f"✅ {notna_mask('type_principal').sum():,} types extraits")
     print(f"\nTop 10 types de POIs:")
-    for i, (type_name, count) in enumerate(df_pois['type_principal'].value_counts().head(10).items(), 1):
-        print(f"  {i:2d}. {type_name:40s}: {count:6,} ({count/len(df_pois)*100:5.1f}%)")
+    top_types = df_pois['type_principal'].value_counts(dropna=True).head(10)
+    top_counts = top_types.to_numpy()
+    top_pcts = top_counts / len(df_pois) * 100
+    for i, (type_name, count, pct) in enumerate(zip(top_types.index, top_counts, top_pcts), 1):
+        print(f"  {i:2d}. {type_name:40s}: {count:6,} ({pct:5.1f}%)")
 
 # Extraire GPS
 def extract_coordinates(located_at):
     located_at = parse_json(located_at)
     if not located_at or not isinstance(located_at, list):
-        return None, None
+        return np.nan, np.nan
 
     for location in located_at:
         if isinstance(location, dict) and 'geo' in location:
@@ -130,44 +197,62 @@ def extract_coordinates(located_at):
                         return float(lat), float(lon)
                     except:
                         pass
-    return None, None
+    return np.nan, np.nan
+
+def extract_coordinates_batch(values):
+    """Coordonnées d'un bloc de POIs, rangées par le worker dans un tableau float64 (N, 2)"""
+    return np.array([extract_coordinates(value) for value in values], dtype=np.float64).reshape(-1, 2)
 
 if 'isLocatedAt' in df_pois.columns:
     print("\nExtraction coordonnées GPS...")
-    coords = df_pois['isLocatedAt'].apply(extract_coordinates)
-    df_pois['latitude'] = coords.apply(lambda x: x[0])
-    df_pois['longitude'] = coords.apply(lambda x: x[1])
-
-    pois_with_coords = df_pois['latitude'].notna().sum()
+    # Un seul passage sur la colonne : chaque worker renvoie un bloc (lat, lon) déjà numérique,
+    # le processus principal ne fait que concaténer les tableaux
+    coords = np.concatenate(
+        parallel_chunks(extract_coordinates_batch, df_pois['isLocatedAt'].to_numpy(dtype=object))
+    )
+    set_column('latitude', coords[:, 0])
+    set_column('longitude', coords[:, 1])
+
+    pois_with_coords = notna_mask('latitude').sum()
     print(f"✅ {pois_with_coords:,} POIs avec GPS ({pois_with_coords/len(df_pois)*100:.1f}%)")
 
     if pois_with_coords > 0:
-        df_geo = df_pois[df_pois['latitude'].notna()]
+        # Bornes calculées sur le tableau des coordonnées (NaN ignorés), sans copie filtrée du DataFrame
+        lat_min, lon_min = np.nanmin(coords, axis=0)
+        lat_max, lon_max = np.nanmax(coords, axis=0)
         print(f"\n📍 Zone géographique:")
-        print(f"  Latitude:  {df_geo['latitude'].min():.4f} à {df_geo['latitude'].max():.4f}")
-        print(f"  Longitude: {df_geo['longitude'].min():.4f} à {df_geo['longitude'].max():.4f}")
+        print(f"  Latitude:  {lat_min:.4f} à {lat_max:.4f}")
+        print(f"  Longitude: {lon_min:.4f} à {lon_max:.4f}")
 
 # Extraire descriptions
-def extract_description_fr(desc_list):
-    desc_list = parse_json(desc_list)
-    if not desc_list or not isinstance(desc_list, list):
-        return None
+def extract_descriptions_fr(parsed):
+    """
+    Description courte FR de chaque POI, calculée sur toute la colonne déjà décodée :
+    les listes sont aplaties (explode) puis normalisées en un seul appel json_normalize
+    """
+    items = parsed[parsed.map(lambda v: isinstance(v, list))].explode()
 
-    for desc in desc_list:
-        if isinstance(desc, dict) and 'shortDescription' in desc:
-            short_desc = desc['shortDescription']
-            if isinstance(short_desc, dict):
-                return short_desc.get('@fr') or short_desc.get('fr')
-            elif isinstance(short_desc, str):
-                return short_desc
-    return None
+    # Premier élément portant une shortDescription exploitable (dict ou texte) pour chaque POI
+    items = items[items.map(lambda d: isinstance(d, dict) and isinstance(d.get('shortDescription'), (dict, str)))]
+    items = items[~items.index.duplicated(keep='first')]
+
+    norm = pd.json_normalize(items.tolist(), max_level=1)
+    norm.index = items.index
+    missing = pd.Series(None, index=norm.index, dtype=object)
+
+    # shortDescription texte, sinon '@fr' (si non vide) puis 'fr'
+    desc_at_fr = norm.get('shortDescription.@fr', missing)
+    desc_fr = desc_at_fr.where(desc_at_fr.notna() & (desc_at_fr != ''), norm.get('shortDescription.fr', missing))
+    desc = norm.get('shortDescription', missing).combine_first(desc_fr)
+
+    return desc.reindex(parsed.index).astype(object).where(lambda d: d.notna(), None)
 
 if 'hasDescription' in df_pois.columns:
     print("\nExtraction descriptions...")
-    df_pois['description'] = df_pois['hasDescription'].apply(extract_description_fr)
-    df_pois['description_length'] = df_pois['description'].fillna('').str.len()
+    set_column('description', extract_descriptions_fr(parsed_column('hasDescription')))
+    set_column('description_length', df_pois['description'].str.len().fillna(0).astype(np.int32))
 
-    pois_with_desc = df_pois['description'].notna().sum()
+    pois_with_desc = notna_mask('description').sum()
     print(f"✅ {pois_with_desc:,} POIs avec description ({pois_with_desc/len(df_pois)*100:.1f}%)")
 
     if pois_with_desc > 0:
@@ -183,57 +268,85 @@ if 'hasDescription' in df_pois.columns:
 print("\n\n⚙️ 5. FEATURES DE QUALITÉ")
 print("-" * 80)
 
-# Calculer features de base
+# Colonnes et nombre de POIs, évalués une seule fois pour toute la section
+pois_columns = set(df_pois.columns)
+n_pois = len(df_pois)
+
+# Calculer features de base (indicateurs binaires en uint8, vues sans copie des masques)
 features = {}
 
 # Has name (colonne 'label')
-if 'label' in df_pois.columns:
-    features['has_name'] = df_pois['label'].notna().astype(int)
+if 'label' in pois_columns:
+    features['has_name'] = notna_mask('label').view(np.uint8)
 
 # Has description
-if 'description' in df_pois.columns:
-    features['has_description'] = df_pois['description'].notna().astype(int)
+if 'description' in pois_columns:
+    features['has_description'] = notna_mask('description').view(np.uint8)
     features['description_length'] = df_pois['description_length']
 
 # Has GPS
-if 'latitude' in df_pois.columns:
-    features['has_gps'] = df_pois['latitude'].notna().astype(int)
+if 'latitude' in pois_columns:
+    features['has_gps'] = notna_mask('latitude').view(np.uint8)
 
 # Has type
-if 'type_principal' in df_pois.columns:
-    features['has_type'] = df_pois['type_principal'].notna().astype(int)
+if 'type_principal' in pois_columns:
+    features['has_type'] = notna_mask('type_principal').view(np.uint8)
 
 # Has contact
-if 'hasContact' in df_pois.columns:
-    features['has_contact'] = df_pois['hasContact'].notna().astype(int)
-
-df_features = pd.DataFrame(features)
+if 'hasContact' in pois_columns:
+    features['has_contact'] = notna_mask('hasContact').view(np.uint8)
 
 print("Features calculées:")
 for feature_name, values in features.items():
     if feature_name != 'description_length':
         count = values.sum() if hasattr(values, 'sum') else 0
-        print(f"  • {feature_name:25s}: {count:6,} / {len(df_pois):6,} ({count/len(df_pois)*100:5.1f}%)")
-
-# Score de complétude simple
-df_features['completeness_score'] = (
-    df_features.get('has_name', 0) * 20 +
-    df_features.get('has_description', 0) * 30 +
-    df_features.get('has_gps', 0) * 20 +
-    df_features.get('has_type', 0) * 15 +
-    df_features.get('has_contact', 0) * 15
+        print(f"  • {feature_name:25s}: {count:6,} / {n_pois:6,} ({count/n_pois*100:5.1f}%)")
+
+# Indicateurs regroupés dans une matrice uint8 en ordre colonne (Fortran) : chaque feature
+# est contiguë en mémoire, pour les réductions par colonne comme pour le DataFrame
+completeness_weights = {
+    'has_name': 20,
+    'has_description': 30,
+    'has_gps': 20,
+    'has_type': 15,
+    'has_contact': 15
+}
+flag_names = [name for name in completeness_weights if name in features]
+flags = np.asfortranarray(
+    np.column_stack([features[name] for name in flag_names]) if flag_names
+    else np.empty((n_pois, 0), dtype=np.uint8)
 )
+df_features = pd.DataFrame(flags, columns=flag_names, index=df_pois.index, copy=False)
+if 'description_length' in features:
+    df_features['description_length'] = features['description_length']
+
+# Score de complétude simple : somme pondérée des indicateurs présents (un seul produit matrice-vecteur)
+df_features['completeness_score'] = flags @ np.array(
+    [completeness_weights[name] for name in flag_names], dtype=np.int16
+)
+
+# Statistiques du score en un passage : somme et somme des carrés (entiers, donc exactes),
+# médiane par sélection partielle (np.partition) au lieu d'un tri complet
+scores = df_features['completeness_score'].to_numpy()
+n_scores = len(scores)
+scores_sum = scores.sum(dtype=np.int64)
+scores_sq_sum = np.dot(scores.astype(np.int64), scores.astype(np.int64))
+score_mean = scores_sum / n_scores
+score_std = np.sqrt((scores_sq_sum - scores_sum * score_mean) / (n_scores - 1))
+mid = n_scores // 2
+if n_scores % 2:
+    score_median = np.partition(scores, mid)[mid]
+else:
+    score_median = np.partition(scores, [mid - 1, mid])[mid - 1:mid + 1].mean()
 
 print(f"\n🎯 Score de Complétude (0-100):")
-print(f"  Moyenne: {df_features['completeness_score'].mean():.1f}")
-print(f"  Médiane: {df_features['completeness_score'].median():.1f}")
-print(f"  Écart-type: {df_features['completeness_score'].std():.1f}")
+print(f"  Moyenne: {score_mean:.1f}")
+print(f"  Médiane: {score_median:.1f}")
+print(f"  Écart-type: {score_std:.1f}")
 
 # Distribution par catégories
-low = (df_features['completeness_score'] < 40).sum()
-medium = ((df_features['completeness_score'] >= 40) & (df_features['completeness_score'] < 60)).sum()
-good = ((df_features['completeness_score'] >= 60) & (df_features['completeness_score'] < 80)).sum()
-excellent = (df_features['completeness_score'] >= 80).sum()
+# Un seul passage : classe 0 (<40), 1 (40-60), 2 (60-80), 3 (>=80)
+low, medium, good, excellent = np.bincount(np.digitize(scores, [40, 60, 80]), minlength=4)
 
 print(f"\n📊 Distribution par qualité:")
 print(f"  ❌ Low (<40):           {low:6,} ({low/len(df_features)*100:5.1f}%)")
@@ -250,15 +363,17 @@ print(f"Total communes: {len(df_communes):,}")
 print(f"Population totale: {df_communes['population'].sum():,.0f}")
 print(f"Population moyenne: {df_communes['population'].mean():,.0f}")
 print(f"\nTop 5 communes:")
-for i, row in df_communes.nlargest(5, 'population').iterrows():
-    print(f"  {i+1}. {row['nom_commune']:30s}: {row['population']:9,.0f} habitants")
+top_communes = df_communes.nlargest(5, 'population')[['nom_commune', 'population']]
+for i, nom_commune, population in top_communes.itertuples(index=True, name=None):
+    print(f"  {i+1}. {nom_commune:30s}: {population:9,.0f} habitants")
 
 print("\n\n🌤️ 7. DONNÉES CLIMATIQUES - RÉGIONS")
 print("-" * 80)
 print(f"{'Région':<35s} {'Temp (°C)':<12s} {'Précip (mm)':<15s} {'Type':<15s}")
 print("-" * 80)
-for _, row in df_climate.iterrows():
-    print(f"{row['region']:<35s} {row['temp_avg_annual']:>8.1f}°C   {row['precipitation_annual_mm']:>10,.0f} mm   {row['climate_type']:<15s}")
+climate_rows = df_climate[['region', 'temp_avg_annual', 'precipitation_annual_mm', 'climate_type']]
+for region, temp_avg, precip, climate_type in climate_rows.itertuples(index=False, name=None):
+    print(f"{region:<35s} {temp_avg:>8.1f}°C   {precip:>10,.0f} mm   {climate_type:<15s}")
 
 # ============================================================================
 # 8. SAUVEGARDE DONNÉES ENRICHIES
@@ -266,31 +381,30 @@ for _, row in df_climate.iterrows():
 print("\n\n💾 8. SAUVEGARDE DONNÉES ENRICHIES")
 print("-" * 80)
 
-# Préparer données pour sauvegarde (colonnes simples uniquement)
-df_pois_simple = pd.DataFrame({
-    # IDs
-    'uuid': df_pois.get('uuid'),
-    'uri': df_pois.get('uri'),
-
-    # Données extraites
-    'type_principal': df_pois.get('type_principal'),
-    'latitude': df_pois.get('latitude'),
-    'longitude': df_pois.get('longitude'),
-    'description': df_pois.get('description'),
-    'description_length': df_pois.get('description_length'),
-
+# Préparer données pour sauvegarde (colonnes simples uniquement) : projection des
+# colonnes utiles, les colonnes absentes des données sources sont créées vides
+df_pois_simple = pd.concat([
+    # IDs + données extraites
+    df_pois.reindex(columns=[
+        'uuid', 'uri',
+        'type_principal', 'latitude', 'longitude', 'description', 'description_length'
+    ]),
     # Features
-    'has_name': df_features.get('has_name'),
-    'has_description': df_features.get('has_description'),
-    'has_gps': df_features.get('has_gps'),
-    'has_type': df_features.get('has_type'),
-    'has_contact': df_features.get('has_contact'),
-    'completeness_score': df_features['completeness_score']
-})
+    df_features.reindex(columns=[
+        'has_name', 'has_description', 'has_gps', 'has_type', 'has_contact', 'completeness_score'
+    ])
+], axis=1)
 
 output_file = Path("../data/processed/pois_enriched_eda.parquet")
 output_file.parent.mkdir(parents=True, exist_ok=True)
-df_pois_simple.to_parquet(output_file, index=False, compression='snappy')
+df_pois_simple.to_parquet(
+    output_file,
+    index=False,
+    engine='pyarrow',
+    compression='zstd',
+    compression_level=3,
+    use_dictionary=['type_principal']
+)
 
 print(f"✅ Sauvegardé: {output_file}")
 print(f"   Records: {len(df_pois_simple):,}")
@@ -306,8 +420,8 @@ print("=" * 80)
 print("\n📈 Résumé:")
 print(f"  • {len(df_pois):,} POIs analysés")
 print(f"  • {len(df_pois.columns)} colonnes disponibles")
-print(f"  • Score qualité moyen: {df_features['completeness_score'].mean():.1f}/100")
-print(f"  • {(df_features['completeness_score'] >= 60).sum():,} POIs de qualité Good ou mieux")
+print(f"  • Score qualité moyen: {score_mean:.1f}/100")
+print(f"  • {good + excellent:,} POIs de qualité Good ou mieux")
 print(f"  • Données enrichies sauvegardées pour feature engineering")
 
 print("\n🎯 Prochaine étape:")
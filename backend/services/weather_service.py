@@ -5,6 +5,7 @@ Centralise toute la logique météo pour les 3 types de demandes :
 2. Interactive : Contexte météo pour conseils personnalisés
 3. Planning : Prévisions pour planification séjour
 """
+import heapq
 import httpx
 import json
 import numpy as np
@@ -16,6 +17,78 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Codes WMO simplifiés : table de correspondance code -> catégorie (défaut "cloudy")
+_CAT_NAMES = np.array(["sunny", "cloudy", "drizzle", "rainy", "snowy", "stormy"])
+_CODE_TO_CAT = np.full(100, 1, dtype=np.int8)
+_CODE_TO_CAT[[0, 1]] = 0
+_CODE_TO_CAT[[2, 3]] = 1
+_CODE_TO_CAT[[51, 53, 55, 56, 57]] = 2
+_CODE_TO_CAT[[61, 63, 65, 66, 67]] = 3
+_CODE_TO_CAT[[71, 73, 75]] = 4
+_CODE_TO_CAT[[95, 96, 99]] = 5
+
+
+def _weather_conditions(weather_codes) -> List[str]:
+    """Traduit une séquence de codes WMO en conditions simplifiées en un seul passage vectorisé"""
+    codes = np.asarray(weather_codes, dtype=float)
+    known = (codes >= 0) & (codes < _CODE_TO_CAT.size)  # NaN (code absent) -> inconnu
+    cats = np.where(known, _CODE_TO_CAT[np.where(known, codes, 0).astype(np.intp)], 1)
+    return _CAT_NAMES[cats].tolist()
+
+
+def _pad_days(values: List, n_days: int, default) -> List:
+    """Tronque ou complète une série journalière Open-Meteo à n_days valeurs"""
+    values = values[:n_days]
+    return values + [default] * (n_days - len(values))
+
+
+def _daily_outdoor_scores(temp_max, precip_sum, precip_prob) -> List[float]:
+    """
+    Calcule les scores de favorabilité (0-1) pour activités extérieures de
+    plusieurs journées à la fois.
+    """
+    temp_max = np.asarray(temp_max, dtype=float)
+    precip_sum = np.asarray(precip_sum, dtype=float)
+    precip_prob = np.asarray(precip_prob, dtype=float)
+    
+    # Pénalité température (bonus pour température idéale)
+    temp_factor = np.select(
+        [(temp_max < 5) | (temp_max > 35), (temp_max < 10) | (temp_max > 30), (temp_max >= 15) & (temp_max <= 25)],
+        [0.3, 0.6, 1.2],
+        1.0
+    )
+    # Pénalité précipitations
+    precip_factor = np.select([precip_sum > 10, precip_sum > 5, precip_sum > 1], [0.2, 0.5, 0.8], 1.0)
+    # Pénalité probabilité pluie
+    prob_factor = np.select([precip_prob > 80, precip_prob > 50], [0.4, 0.7], 1.0)
+    
+    return np.clip(temp_factor * precip_factor * prob_factor, 0.0, 1.0).tolist()
+
+
+# Conseils personnalisés : tendance de température -> conseil
+_TREND_ADVICE = {
+    "falling": "Températures en baisse, prévoyez une veste",
+    "rising": "Températures en hausse, profitez-en pour les activités extérieures"
+}
+
+# Conseils personnalisés : préférence d'activité -> conseil selon les prochaines heures
+_PREF_ADVICE = {
+    "nature": lambda next_hours: (
+        "Forte probabilité de pluie, reprogrammez les activités nature"
+        if next_hours.get("rain_likelihood", 0) > 70
+        else "Conditions favorables pour les activités nature"
+    )
+}
+
+
+def _suitable_for_outdoor(precipitation, wind_speed, temperature):
+    """
+    Critères de base pour les activités extérieures : moins de 2mm de pluie,
+    vent inférieur à 50 km/h et température entre 0 et 35°C.
+    Accepte des scalaires ou des tableaux NumPy (résultat booléen élément par élément).
+    """
+    return (precipitation <= 2) & (wind_speed <= 50) & (temperature >= 0) & (temperature <= 35)
+
 
 class WeatherService:
     """Service météo unifié pour tous les types de demandes touristiques"""
@@ -24,6 +97,7 @@ class WeatherService:
         # Configuration Open-Meteo
         self.base_url = "https://api.open-meteo.com/v1"
         self.timeout = 10  # Timeout pour les requetes HTTP
+        self._client: Optional[httpx.AsyncClient] = None  # Client HTTP/2 partage (cree a la demande)
         
         # Coordonnees Annecy
         self.default_locations = {
@@ -54,6 +128,25 @@ class WeatherService:
             }
         }
     
+    def _get_client(self) -> httpx.AsyncClient:
+        """
+        Retourne le client HTTP partage. Open-Meteo supporte HTTP/2 : les appels
+        concurrents sont multiplexes sur une seule connexion TCP/TLS.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+                timeout=httpx.Timeout(self.timeout, connect=2.0, read=8.0)
+            )
+        return self._client
+    
+    async def close(self):
+        """Ferme le client HTTP partage"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
     async def get_forecast(self, location: str = 'annecy', days: int = 3) -> Dict:
         """
         Recupere les previsions Open-Meteo pour une localisation
@@ -118,11 +211,11 @@ class WeatherService:
                 'forecast_days': min(days, 7)
             }
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(f"{self.base_url}/forecast", params=params)
-                response.raise_for_status()
-                return response.json()
-                
+            client = self._get_client()
+            response = await client.get(f"{self.base_url}/forecast", params=params)
+            response.raise_for_status()
+            return response.json()
+            
         except Exception as e:
             logger.error(f"Erreur requete Open-Meteo: {e}")
             return None
@@ -589,39 +682,39 @@ class WeatherService:
         """
         try:
             # Utiliser l'API current weather d'Open-Meteo
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/forecast",
-                    params={
-                        "latitude": latitude,
-                        "longitude": longitude,
-                        "current": "temperature_2m,relative_humidity_2m,is_day,precipitation,weather_code,cloud_cover,wind_speed_10m",
-                        "timezone": "Europe/Paris"
-                    }
-                )
-                
-                if response.status_code != 200:
-                    logger.warning(f"Erreur API météo: {response.status_code}")
-                    return self._get_mock_current_weather()
-                
-                data = response.json()
-                current = data.get("current", {})
-                
-                # Formater pour utilisation Flash
-                return {
-                    "temperature": current.get("temperature_2m", 15),
-                    "humidity": current.get("relative_humidity_2m", 60),
-                    "is_day": current.get("is_day", 1) == 1,
-                    "is_raining": current.get("precipitation", 0) > 0,
-                    "cloud_cover": current.get("cloud_cover", 50),
-                    "wind_speed": current.get("wind_speed_10m", 0),
-                    "weather_code": current.get("weather_code", 1),
-                    "condition": self._get_weather_condition_simple(current),
-                    "suitable_for_outdoor": self._is_suitable_for_outdoor(current),
-                    "recommendations": self._get_flash_weather_recommendations(current),
-                    "timestamp": datetime.now().isoformat()
+            client = self._get_client()
+            response = await client.get(
+                f"{self.base_url}/forecast",
+                params={
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "current": "temperature_2m,relative_humidity_2m,is_day,precipitation,weather_code,cloud_cover,wind_speed_10m",
+                    "timezone": "Europe/Paris"
                 }
-                
+            )
+            
+            if response.status_code != 200:
+                logger.warning(f"Erreur API météo: {response.status_code}")
+                return self._get_mock_current_weather()
+            
+            data = response.json()
+            current = data.get("current", {})
+            
+            # Formater pour utilisation Flash
+            return {
+                "temperature": current.get("temperature_2m", 15),
+                "humidity": current.get("relative_humidity_2m", 60),
+                "is_day": current.get("is_day", 1) == 1,
+                "is_raining": current.get("precipitation", 0) > 0,
+                "cloud_cover": current.get("cloud_cover", 50),
+                "wind_speed": current.get("wind_speed_10m", 0),
+                "weather_code": current.get("weather_code", 1),
+                "condition": self._get_weather_condition_simple(current),
+                "suitable_for_outdoor": self._is_suitable_for_outdoor(current),
+                "recommendations": self._get_flash_weather_recommendations(current),
+                "timestamp": datetime.now().isoformat()
+            }
+            
         except Exception as e:
             logger.error(f"Erreur get_current_weather: {e}")
             return self._get_mock_current_weather()
@@ -638,47 +731,47 @@ class WeatherService:
         """
         try:
             # Récupérer météo actuelle + prévisions 24h
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/forecast",
-                    params={
-                        "latitude": latitude,
-                        "longitude": longitude,
-                        "current": "temperature_2m,precipitation,weather_code,cloud_cover,wind_speed_10m",
-                        "hourly": "temperature_2m,precipitation_probability,weather_code",
-                        "forecast_days": 1,
-                        "timezone": "Europe/Paris"
-                    }
-                )
-                
-                if response.status_code != 200:
-                    return self._get_mock_interactive_weather()
-                
-                data = response.json()
-                current = data.get("current", {})
-                hourly = data.get("hourly", {})
-                
-                # Analyser les prévisions des prochaines heures
-                next_hours_analysis = self._analyze_next_hours(hourly)
-                
-                # Adapter selon préférences utilisateur
-                weather_advice = self._generate_personalized_weather_advice(
-                    current, next_hours_analysis, user_preferences
-                )
-                
-                return {
-                    "current_conditions": {
-                        "temperature": current.get("temperature_2m", 15),
-                        "condition": self._get_weather_condition_simple(current),
-                        "is_favorable": self._is_suitable_for_outdoor(current)
-                    },
-                    "next_hours": next_hours_analysis,
-                    "personalized_advice": weather_advice,
-                    "activity_recommendations": self._get_interactive_activity_recommendations(current, user_preferences),
-                    "timing_suggestions": self._get_timing_suggestions(next_hours_analysis),
-                    "context_for_chat": self._generate_weather_context_text(current, next_hours_analysis)
+            client = self._get_client()
+            response = await client.get(
+                f"{self.base_url}/forecast",
+                params={
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "current": "temperature_2m,precipitation,weather_code,cloud_cover,wind_speed_10m",
+                    "hourly": "temperature_2m,precipitation_probability,weather_code",
+                    "forecast_days": 1,
+                    "timezone": "Europe/Paris"
                 }
-                
+            )
+            
+            if response.status_code != 200:
+                return self._get_mock_interactive_weather()
+            
+            data = response.json()
+            current = data.get("current", {})
+            hourly = data.get("hourly", {})
+            
+            # Analyser les prévisions des prochaines heures
+            next_hours_analysis = self._analyze_next_hours(hourly)
+            
+            # Adapter selon préférences utilisateur
+            weather_advice = self._generate_personalized_weather_advice(
+                current, next_hours_analysis, user_preferences
+            )
+            
+            return {
+                "current_conditions": {
+                    "temperature": current.get("temperature_2m", 15),
+                    "condition": self._get_weather_condition_simple(current),
+                    "is_favorable": self._is_suitable_for_outdoor(current)
+                },
+                "next_hours": next_hours_analysis,
+                "personalized_advice": weather_advice,
+                "activity_recommendations": self._get_interactive_activity_recommendations(current, user_preferences),
+                "timing_suggestions": self._get_timing_suggestions(next_hours_analysis),
+                "context_for_chat": self._generate_weather_context_text(current, next_hours_analysis)
+            }
+            
         except Exception as e:
             logger.error(f"Erreur get_interactive_weather_context: {e}")
             return self._get_mock_interactive_weather()
@@ -696,43 +789,43 @@ class WeatherService:
         """
         try:
             # Récupérer prévisions étendues
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/forecast",
-                    params={
-                        "latitude": latitude,
-                        "longitude": longitude,
-                        "daily": "weather_code,temperature_2m_max,temperature_2m_min,precipitation_sum,precipitation_probability_max",
-                        "forecast_days": min(duration_days, 14),  # Max 14 jours
-                        "timezone": "Europe/Paris"
-                    }
-                )
-                
-                if response.status_code != 200:
-                    return self._get_mock_planning_weather(duration_days)
-                
-                data = response.json()
-                daily = data.get("daily", {})
-                
-                # Analyser jour par jour pour planification
-                daily_analysis = self._analyze_daily_for_planning(daily)
-                
-                # Suggestions d'optimisation d'itinéraire
-                itinerary_suggestions = self._generate_itinerary_weather_suggestions(daily_analysis)
-                
-                return {
-                    "forecast_period": {
-                        "start_date": start_date or datetime.now().strftime("%Y-%m-%d"),
-                        "duration_days": duration_days,
-                        "forecast_available_days": len(daily_analysis)
-                    },
-                    "daily_forecasts": daily_analysis,
-                    "itinerary_suggestions": itinerary_suggestions,
-                    "best_days": self._identify_best_weather_days(daily_analysis),
-                    "weather_risks": self._identify_planning_weather_risks(daily_analysis),
-                    "alternative_plans": self._generate_weather_alternative_plans(daily_analysis)
+            client = self._get_client()
+            response = await client.get(
+                f"{self.base_url}/forecast",
+                params={
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "daily": "weather_code,temperature_2m_max,temperature_2m_min,precipitation_sum,precipitation_probability_max",
+                    "forecast_days": min(duration_days, 14),  # Max 14 jours
+                    "timezone": "Europe/Paris"
                 }
-                
+            )
+            
+            if response.status_code != 200:
+                return self._get_mock_planning_weather(duration_days)
+            
+            data = response.json()
+            daily = data.get("daily", {})
+            
+            # Analyser jour par jour pour planification
+            daily_analysis = self._analyze_daily_for_planning(daily)
+            
+            # Suggestions d'optimisation d'itinéraire
+            itinerary_suggestions = self._generate_itinerary_weather_suggestions(daily_analysis)
+            
+            return {
+                "forecast_period": {
+                    "start_date": start_date or datetime.now().strftime("%Y-%m-%d"),
+                    "duration_days": duration_days,
+                    "forecast_available_days": len(daily_analysis)
+                },
+                "daily_forecasts": daily_analysis,
+                "itinerary_suggestions": itinerary_suggestions,
+                "best_days": self._identify_best_weather_days(daily_analysis),
+                "weather_risks": self._identify_planning_weather_risks(daily_analysis),
+                "alternative_plans": self._generate_weather_alternative_plans(daily_analysis)
+            }
+            
         except Exception as e:
             logger.error(f"Erreur get_planning_weather_forecast: {e}")
             return self._get_mock_planning_weather(duration_days)
@@ -743,39 +836,15 @@ class WeatherService:
     
     def _get_weather_condition_simple(self, weather_data: Dict) -> str:
         """Détermine la condition météo simplifiée"""
-        weather_code = weather_data.get("weather_code", 1)
-        
-        # Codes WMO simplifiés
-        if weather_code in [0, 1]:
-            return "sunny"
-        elif weather_code in [2, 3]:
-            return "cloudy"
-        elif weather_code in [51, 53, 55, 56, 57]:
-            return "drizzle"
-        elif weather_code in [61, 63, 65, 66, 67]:
-            return "rainy"
-        elif weather_code in [71, 73, 75]:
-            return "snowy"
-        elif weather_code in [95, 96, 99]:
-            return "stormy"
-        else:
-            return "cloudy"
+        return _weather_conditions([weather_data.get("weather_code", 1)])[0]
     
     def _is_suitable_for_outdoor(self, weather_data: Dict) -> bool:
         """Détermine si la météo est favorable aux activités extérieures"""
-        precipitation = weather_data.get("precipitation", 0)
-        wind_speed = weather_data.get("wind_speed_10m", 0)
-        temperature = weather_data.get("temperature_2m", 15)
-        
-        # Critères de base
-        if precipitation > 2:  # Plus de 2mm de pluie
-            return False
-        if wind_speed > 50:  # Vent fort
-            return False
-        if temperature < 0 or temperature > 35:  # Températures extrêmes
-            return False
-        
-        return True
+        return bool(_suitable_for_outdoor(
+            weather_data.get("precipitation", 0),
+            weather_data.get("wind_speed_10m", 0),
+            weather_data.get("temperature_2m", 15)
+        ))
     
     def _get_flash_weather_recommendations(self, weather_data: Dict) -> List[str]:
         """Recommandations rapides selon météo actuelle"""
@@ -857,18 +926,17 @@ class WeatherService:
             advice.append("Il pleut actuellement, privilégiez les activités couvertes")
         
         # Conseil selon tendance
-        if next_hours.get("temperature_trend") == "falling":
-            advice.append("Températures en baisse, prévoyez une veste")
-        elif next_hours.get("temperature_trend") == "rising":
-            advice.append("Températures en hausse, profitez-en pour les activités extérieures")
+        if (trend_advice := _TREND_ADVICE.get(next_hours.get("temperature_trend"))):
+            advice.append(trend_advice)
         
         # Conseil selon préférences utilisateur
         if user_preferences:
-            if "nature" in user_preferences.get("activity_preferences", []):
-                if next_hours.get("rain_likelihood", 0) > 70:
-                    advice.append("Forte probabilité de pluie, reprogrammez les activités nature")
-                else:
-                    advice.append("Conditions favorables pour les activités nature")
+            preferences = user_preferences.get("activity_preferences", [])
+            advice.extend(
+                build_advice(next_hours)
+                for preference, build_advice in _PREF_ADVICE.items()
+                if preference in preferences
+            )
         
         return advice or ["Conditions météo normales pour la saison"]
     
@@ -912,6 +980,15 @@ class WeatherService:
         precip_prob = daily_data.get("precipitation_probability_max", [])
         weather_codes = daily_data.get("weather_code", [])
         
+        # Conditions et scores calculés en un seul passage vectorisé sur toute la période
+        n_days = len(dates)
+        conditions = _weather_conditions(_pad_days(weather_codes, n_days, 1))
+        outdoor_scores = _daily_outdoor_scores(
+            _pad_days(temp_max, n_days, 20),
+            _pad_days(precip_sum, n_days, 0),
+            _pad_days(precip_prob, n_days, 0)
+        )
+        
         for i in range(len(dates)):
             day_analysis = {
                 "date": dates[i],
@@ -923,12 +1000,8 @@ class WeatherService:
                     "sum": precip_sum[i] if i < len(precip_sum) else 0,
                     "probability": precip_prob[i] if i < len(precip_prob) else 0
                 },
-                "condition": self._get_weather_condition_simple({"weather_code": weather_codes[i] if i < len(weather_codes) else 1}),
-                "outdoor_score": self._calculate_daily_outdoor_score(
-                    temp_max[i] if i < len(temp_max) else 20,
-                    precip_sum[i] if i < len(precip_sum) else 0,
-                    precip_prob[i] if i < len(precip_prob) else 0
-                ),
+                "condition": conditions[i],
+                "outdoor_score": outdoor_scores[i],
                 "activity_recommendations": self._get_daily_activity_recommendations(
                     temp_max[i] if i < len(temp_max) else 20,
                     precip_sum[i] if i < len(precip_sum) else 0
@@ -940,31 +1013,7 @@ class WeatherService:
     
     def _calculate_daily_outdoor_score(self, temp_max: float, precip_sum: float, precip_prob: float) -> float:
         """Calcule un score de favorabilité pour activités extérieures"""
-        score = 1.0
-        
-        # Pénalité température
-        if temp_max < 5 or temp_max > 35:
-            score *= 0.3
-        elif temp_max < 10 or temp_max > 30:
-            score *= 0.6
-        elif temp_max >= 15 and temp_max <= 25:
-            score *= 1.2  # Bonus température idéale
-        
-        # Pénalité précipitations
-        if precip_sum > 10:
-            score *= 0.2
-        elif precip_sum > 5:
-            score *= 0.5
-        elif precip_sum > 1:
-            score *= 0.8
-        
-        # Pénalité probabilité pluie
-        if precip_prob > 80:
-            score *= 0.4
-        elif precip_prob > 50:
-            score *= 0.7
-        
-        return min(max(score, 0.0), 1.0)
+        return _daily_outdoor_scores([temp_max], [precip_sum], [precip_prob])[0]
     
     def _get_daily_activity_recommendations(self, temp_max: float, precip_sum: float) -> Dict:
         """Recommandations d'activités pour une journée"""
@@ -989,11 +1038,7 @@ class WeatherService:
     
     def _identify_best_weather_days(self, daily_analysis: List[Dict]) -> List[Dict]:
         """Identifie les meilleures journées météo"""
-        return sorted(
-            daily_analysis, 
-            key=lambda x: x["outdoor_score"], 
-            reverse=True
-        )[:3]  # Top 3
+        return heapq.nlargest(3, daily_analysis, key=lambda x: x["outdoor_score"])  # Top 3
     
     def _generate_itinerary_weather_suggestions(self, daily_analysis: List[Dict]) -> List[str]:
         """Suggestions d'optimisation d'itinéraire selon météo"""
@@ -11,6 +11,9 @@ import requests
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import pydeck as pdk
+from plotly.colors import sample_colorscale, unlabel_rgb
+from types import MappingProxyType
 from typing import Optional
 
 # Configuration de la page
@@ -24,6 +27,18 @@ st.set_page_config(
 # Configuration API
 API_URL = "http://localhost:8000"
 
+# Villes prédéfinies pour l'analyse de zone (construites une fois par processus)
+CITIES = {
+    "Paris": (48.8566, 2.3522),
+    "Marseille": (43.2965, 5.3698),
+    "Lyon": (45.7640, 4.8357),
+    "Toulouse": (43.6047, 1.4442),
+    "Nice": (43.7102, 7.2620),
+    "Bordeaux": (44.8378, -0.5792),
+    "Personnalisé": None
+}
+CITY_NAMES = list(CITIES)
+
 # Style CSS custom
 st.markdown("""
 <style>
@@ -49,6 +64,20 @@ st.markdown("""
     .stAlert {
         margin-top: 1rem;
     }
+    .score-card {
+        padding: 2rem;
+        border-radius: 1rem;
+        text-align: center;
+        margin-bottom: 1rem;
+        color: white;
+    }
+    .score-value {
+        font-size: 3rem;
+        font-weight: bold;
+    }
+    .score-level {
+        font-size: 1.5rem;
+    }
 </style>
 """, unsafe_allow_html=True)
 
@@ -79,6 +108,7 @@ def get_benchmark():
         return None
 
 
+@st.cache_data(ttl=300, show_spinner=False)
 def score_poi(poi_data: dict):
     """Score un POI via l'API"""
     try:
@@ -106,6 +136,7 @@ def get_opportunities(limit: int = 50, min_score: float = 0):
         return None
 
 
+@st.cache_data(ttl=300, show_spinner=False)
 def analyze_zone(lat: float, lon: float, radius_km: float):
     """Analyse une zone géographique"""
     try:
@@ -121,6 +152,83 @@ def analyze_zone(lat: float, lon: float, radius_km: float):
         return None
 
 
+# ============================================================================
+# CHART TEMPLATES
+# ============================================================================
+# Les figures sont construites une seule fois par processus avec plotly.graph_objects
+# (sans le passage DataFrame -> dict de Plotly Express) ; chaque rerun copie le
+# gabarit puis ne met à jour que les données.
+
+QUALITY_LEVELS = ['LOW', 'MEDIUM', 'GOOD', 'EXCELLENT']
+# Couleur associée à chaque niveau (graphique de distribution et carte de score)
+QUALITY_COLORS = MappingProxyType({
+    'LOW': '#ff4444',
+    'MEDIUM': '#ffaa00',
+    'GOOD': '#88cc00',
+    'EXCELLENT': '#00cc44'
+})
+
+# Options communes des graphiques : thème Plotly natif (theme=None côté Streamlit)
+# et barre d'outils masquée ; uirevision conserve zoom/pan d'un rerun à l'autre
+PLOTLY_CONFIG = {'displayModeBar': False, 'scrollZoom': True}
+
+
+@st.cache_resource
+def _quality_fig_template() -> go.Figure:
+    """Gabarit du graphique de distribution de la qualité"""
+    fig = go.Figure(go.Bar(
+        x=QUALITY_LEVELS,
+        y=[0] * len(QUALITY_LEVELS),
+        marker_color=[QUALITY_COLORS[level] for level in QUALITY_LEVELS],
+        texttemplate='%{text:,}',
+        textposition='outside'
+    ))
+    fig.update_layout(
+        showlegend=False,
+        height=400,
+        xaxis_title='Niveau',
+        yaxis_title='Nombre',
+        uirevision='quality_dist'
+    )
+    return fig
+
+
+@st.cache_resource
+def _types_fig_template() -> go.Figure:
+    """Gabarit du graphique des types de POIs (barres horizontales)"""
+    fig = go.Figure(go.Bar(
+        orientation='h',
+        texttemplate='%{text:.1f}%',
+        textposition='outside'
+    ))
+    fig.update_layout(
+        height=400,
+        xaxis_title='Pourcentage',
+        yaxis_title='Type',
+        yaxis={'categoryorder': 'total ascending'},
+        uirevision='types_dist'
+    )
+    return fig
+
+
+@st.cache_resource
+def _zones_fig_template() -> go.Figure:
+    """Gabarit de la carte des zones les plus denses"""
+    fig = go.Figure(go.Scattermapbox(
+        mode='markers',
+        marker={'sizemode': 'area', 'colorscale': 'Viridis', 'showscale': True},
+        hovertemplate='n_pois=%{marker.color}<br>lat=%{lat}<br>lon=%{lon}<extra></extra>'
+    ))
+    fig.update_layout(
+        mapbox_style="open-street-map",
+        mapbox_zoom=5,
+        height=500,
+        margin={"r": 0, "t": 0, "l": 0, "b": 0},
+        uirevision='zones_map'
+    )
+    return fig
+
+
 # ============================================================================
 # SIDEBAR
 # ============================================================================
@@ -203,77 +311,41 @@ if page == "📊 Vue d'ensemble":
             st.subheader("Distribution de la Qualité")
 
             quality_dist = benchmark['quality_distribution']
-            df_quality = pd.DataFrame({
-                'Niveau': list(quality_dist.keys()),
-                'Nombre': list(quality_dist.values())
-            })
-
-            # Ordre des niveaux
-            order = ['LOW', 'MEDIUM', 'GOOD', 'EXCELLENT']
-            df_quality['Niveau'] = pd.Categorical(df_quality['Niveau'], categories=order, ordered=True)
-            df_quality = df_quality.sort_values('Niveau')
-
-            # Couleurs
-            colors = {'LOW': '#ff4444', 'MEDIUM': '#ffaa00', 'GOOD': '#88cc00', 'EXCELLENT': '#00cc44'}
-            df_quality['Couleur'] = df_quality['Niveau'].map(colors)
-
-            fig = px.bar(
-                df_quality,
-                x='Niveau',
-                y='Nombre',
-                color='Niveau',
-                color_discrete_map=colors,
-                text='Nombre'
-            )
-            fig.update_traces(texttemplate='%{text:,}', textposition='outside')
-            fig.update_layout(showlegend=False, height=400)
-            st.plotly_chart(fig, use_container_width=True)
+            counts = [quality_dist.get(level, 0) for level in QUALITY_LEVELS]
+
+            fig = go.Figure(_quality_fig_template())
+            fig.update_traces(y=counts, text=counts)
+            st.plotly_chart(fig, use_container_width=True, theme=None, config=PLOTLY_CONFIG)
 
         with col2:
             st.subheader("Top 10 Types de POIs")
 
-            types_dist = benchmark['types_distribution']
-            df_types = pd.DataFrame({
-                'Type': list(types_dist.keys()),
-                'Pourcentage': list(types_dist.values())
-            }).head(10)
+            top_types = list(benchmark['types_distribution'].items())[:10]
+            types = [t for t, _ in top_types]
+            pcts = [pct for _, pct in top_types]
 
-            fig = px.bar(
-                df_types,
-                x='Pourcentage',
-                y='Type',
-                orientation='h',
-                text='Pourcentage'
-            )
-            fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-            fig.update_layout(height=400, yaxis={'categoryorder': 'total ascending'})
-            st.plotly_chart(fig, use_container_width=True)
+            fig = go.Figure(_types_fig_template())
+            fig.update_traces(x=pcts, y=types, text=pcts)
+            st.plotly_chart(fig, use_container_width=True, theme=None, config=PLOTLY_CONFIG)
 
         # Carte des zones
         st.markdown("---")
         st.subheader("🗺️ Top 10 Zones les Plus Denses")
 
         top_zones = benchmark['top_zones']
-        df_zones = pd.DataFrame(top_zones)
-
-        fig = px.scatter_mapbox(
-            df_zones,
-            lat='lat',
-            lon='lon',
-            size='n_pois',
-            color='n_pois',
-            hover_name='n_pois',
-            hover_data={'lat': True, 'lon': True, 'n_pois': True},
-            color_continuous_scale='Viridis',
-            size_max=30,
-            zoom=5
-        )
-        fig.update_layout(
-            mapbox_style="open-street-map",
-            height=500,
-            margin={"r": 0, "t": 0, "l": 0, "b": 0}
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        lats = [z['lat'] for z in top_zones]
+        lons = [z['lon'] for z in top_zones]
+        n_pois = [z['n_pois'] for z in top_zones]
+
+        fig = go.Figure(_zones_fig_template())
+        if top_zones:
+            fig.update_traces(
+                lat=lats,
+                lon=lons,
+                marker={'size': n_pois, 'color': n_pois, 'sizeref': 2 * max(n_pois) / 30 ** 2}
+            )
+            fig.update_layout(mapbox_center={'lat': sum(lats) / len(lats), 'lon': sum(lons) / len(lons)})
+        st.plotly_chart(fig, use_container_width=True, theme=None, config=PLOTLY_CONFIG)
 
 
 # ============================================================================
@@ -353,20 +425,13 @@ elif page == "🎯 Scorer un POI":
             level = result['quality_level']
 
             # Couleur selon le niveau
-            color_map = {
-                'EXCELLENT': '#00cc44',
-                'GOOD': '#88cc00',
-                'MEDIUM': '#ffaa00',
-                'LOW': '#ff4444'
-            }
-            color = color_map.get(level, '#888')
+            color = QUALITY_COLORS.get(level, '#888')
 
-            st.markdown(f"""
-            <div style="background-color: {color}; padding: 2rem; border-radius: 1rem; text-align: center; margin-bottom: 1rem;">
-                <div style="font-size: 3rem; font-weight: bold; color: white;">{score}</div>
-                <div style="font-size: 1.5rem; color: white;">{level}</div>
-            </div>
-            """, unsafe_allow_html=True)
+            st.markdown(
+                f'<div class="score-card" style="background-color: {color};">'
+                f'<div class="score-value">{score}</div><div class="score-level">{level}</div></div>',
+                unsafe_allow_html=True
+            )
 
             # Confiance
             confidence = result['confidence'] * 100
@@ -422,52 +487,63 @@ elif page == "💡 Opportunités":
             st.warning("Aucune opportunité trouvée avec ces critères")
         else:
             # Carte des opportunités
-            df_opps = pd.DataFrame(opportunities)
-
-            fig = px.scatter_mapbox(
-                df_opps,
-                lat='lat',
-                lon='lon',
-                size='gap_pct',
-                color='opportunity_score',
-                hover_name='type_manquant',
-                hover_data={
-                    'zone': True,
-                    'gap_pct': ':.1f',
-                    'n_pois_zone': True,
-                    'opportunity_score': ':.1f'
-                },
-                color_continuous_scale='RdYlGn',
-                size_max=20,
-                zoom=5
+            # Rendu WebGL (deck.gl) : couleur selon le score, rayon selon le gap
+            # Seules les colonnes affichées sont envoyées au navigateur, avec une précision réduite
+            df_opps = pd.DataFrame(opportunities)[
+                ['lat', 'lon', 'gap_pct', 'opportunity_score', 'type_manquant', 'zone', 'n_pois_zone']
+            ]
+            df_opps = df_opps.round({'lat': 6, 'lon': 6, 'gap_pct': 1, 'opportunity_score': 1})
+            scores = (df_opps['opportunity_score'].clip(0, 100) / 100).tolist()
+            df_opps['color'] = [[int(c) for c in unlabel_rgb(rgb)] for rgb in sample_colorscale('RdYlGn', scores)]
+            max_gap = df_opps['gap_pct'].max() or 1
+            df_opps['radius'] = (df_opps['gap_pct'].clip(lower=0) / max_gap) ** 0.5 * 10
+
+            layer = pdk.Layer(
+                "ScatterplotLayer",
+                data=df_opps,
+                get_position=['lon', 'lat'],
+                get_fill_color='color',
+                get_radius='radius',
+                radius_units='pixels',
+                radius_min_pixels=2,
+                opacity=0.8,
+                pickable=True
             )
-            fig.update_layout(
-                mapbox_style="open-street-map",
-                height=500,
-                margin={"r": 0, "t": 0, "l": 0, "b": 0}
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            view_state = pdk.ViewState(latitude=df_opps['lat'].mean(), longitude=df_opps['lon'].mean(), zoom=5)
+            tooltip = {
+                "html": "<b>{type_manquant}</b><br/>Zone: {zone}<br/>Gap: {gap_pct}%<br/>"
+                        "POIs: {n_pois_zone}<br/>Score: {opportunity_score}"
+            }
+            st.pydeck_chart(pdk.Deck(layers=[layer], initial_view_state=view_state, tooltip=tooltip), height=500)
 
             st.markdown("---")
 
             # Tableau des opportunités
             st.subheader(f"📋 Top {len(opportunities)} Opportunités")
 
-            for i, opp in enumerate(opportunities[:10], 1):
-                with st.expander(f"#{i} - {opp['type_manquant']} - {opp['zone']}"):
-                    col_a, col_b, col_c = st.columns(3)
-
-                    with col_a:
-                        st.metric("Score d'opportunité", f"{opp['opportunity_score']:.1f}/100")
-                        st.metric("Gap détecté", f"{opp['gap_pct']:.1f}%")
-
-                    with col_b:
-                        st.metric("POIs dans la zone", opp['n_pois_zone'])
-                        st.metric("Qualité moyenne zone", f"{opp['avg_quality_zone']:.1f}/100")
-
-                    with col_c:
-                        st.info(f"**Raison:** {opp['raison']}")
-                        st.info(f"**Niveau:** {opp['opportunity_level']}")
+            # Un seul tableau plutôt qu'un expander par opportunité (un seul message vers le navigateur)
+            df_top = pd.DataFrame(opportunities[:10])[
+                ['type_manquant', 'zone', 'opportunity_score', 'gap_pct', 'n_pois_zone',
+                 'avg_quality_zone', 'raison', 'opportunity_level']
+            ]
+            df_top.index = range(1, len(df_top) + 1)
+            st.dataframe(
+                df_top,
+                column_config={
+                    '_index': st.column_config.NumberColumn("#"),
+                    'type_manquant': "Type manquant",
+                    'zone': "Zone",
+                    'opportunity_score': st.column_config.ProgressColumn(
+                        "Score d'opportunité", format="%.1f", min_value=0, max_value=100
+                    ),
+                    'gap_pct': st.column_config.NumberColumn("Gap détecté", format="%.1f%%"),
+                    'n_pois_zone': st.column_config.NumberColumn("POIs dans la zone"),
+                    'avg_quality_zone': st.column_config.NumberColumn("Qualité moyenne zone", format="%.1f/100"),
+                    'raison': st.column_config.TextColumn("Raison", width="large"),
+                    'opportunity_level': "Niveau"
+                },
+                use_container_width=True
+            )
 
 
 # ============================================================================
@@ -485,21 +561,10 @@ elif page == "🗺️ Analyse de zone":
     with col1:
         st.subheader("Paramètres")
 
-        # Villes prédéfinies
-        cities = {
-            "Paris": (48.8566, 2.3522),
-            "Marseille": (43.2965, 5.3698),
-            "Lyon": (45.7640, 4.8357),
-            "Toulouse": (43.6047, 1.4442),
-            "Nice": (43.7102, 7.2620),
-            "Bordeaux": (44.8378, -0.5792),
-            "Personnalisé": None
-        }
-
-        city = st.selectbox("Ville", list(cities.keys()))
-
-        if cities[city] is not None:
-            default_lat, default_lon = cities[city]
+        city = st.selectbox("Ville", CITY_NAMES)
+
+        if CITIES[city] is not None:
+            default_lat, default_lon = CITIES[city]
         else:
             default_lat, default_lon = 48.8566, 2.3522
 
@@ -543,8 +608,8 @@ elif page == "🗺️ Analyse de zone":
             }).head(10)
 
             fig = px.pie(df_types, values='Nombre', names='Type', hole=0.4)
-            fig.update_layout(height=400)
-            st.plotly_chart(fig, use_container_width=True)
+            fig.update_layout(height=400, uirevision='zone_pie')
+            st.plotly_chart(fig, use_container_width=True, theme=None, config=PLOTLY_CONFIG)
 
             # Top POIs
             if stats['top_pois']:
@@ -0,0 +1,42 @@
+"""
+Unit Tests for the Data Collectors Module
+=========================================
+
+Tests cover:
+- Lazy loading of every exported collector
+- Collector factory
+
+Author: Nicolas Angougeard
+"""
+
+import pytest
+
+import data
+import data.collectors as collectors
+
+
+# ============================================
+# Test Lazy Exports
+# ============================================
+
+@pytest.mark.parametrize("module", [collectors, data], ids=["data.collectors", "data"])
+def test_all_names_resolve(module):
+    """Test that every name in __all__ resolves through the lazy __getattr__."""
+    for name in module.__all__:
+        assert getattr(module, name) is not None, name
+
+
+def test_unknown_name_raises():
+    """Test that unknown attributes still raise AttributeError."""
+    with pytest.raises(AttributeError):
+        collectors.UnknownCollector
+
+
+def test_get_all_collectors(monkeypatch):
+    """Test that the factory instantiates every collector class."""
+    monkeypatch.setenv("DATATOURISME_API_KEY", "test")
+
+    instances = collectors.get_all_collectors()
+
+    assert set(instances) == {"datatourisme", "opendatasoft", "openmeteo"}
+    assert {type(c).__name__ for c in instances.values()} == set(collectors.__all__)
@@ -0,0 +1,124 @@
+"""
+Unit Tests for DATAtourisme Collector
+=====================================
+
+Tests cover:
+- Streaming POI pages to Parquet
+- Schema drift between pages (type promotion, late columns)
+
+Author: Nicolas Angougeard
+"""
+
+import pytest
+import pyarrow.parquet as pq
+
+from data.ingestion.datatourisme_collector import DATAtourismeCollector
+
+
+# ============================================
+# Fixtures
+# ============================================
+
+@pytest.fixture
+def collector():
+    """Collector with a dummy API key (no network access)."""
+    return DATAtourismeCollector(api_key="test")
+
+
+def collect_pages(collector, pages, output_file, save_interval):
+    """Run collect_pois over canned API pages and read back the Parquet columns."""
+    responses = iter([
+        {
+            "objects": objects,
+            "meta": {"next": f"https://api.example/catalog?crs={i}" if i < len(pages) - 1 else None}
+        }
+        for i, objects in enumerate(pages)
+    ])
+    collector._fetch_page = lambda params, delay=0.0: next(responses)
+
+    collected = collector.collect_pois(str(output_file), limit=100, save_interval=save_interval)
+
+    assert collected == sum(len(objects) for objects in pages)
+    assert list(output_file.parent.iterdir()) == [output_file]  # partial files merged away
+    return pq.read_table(output_file).to_pydict()
+
+
+# ============================================
+# Test Schema Drift
+# ============================================
+
+@pytest.mark.parametrize("save_interval", [1, 1000], ids=["separate_row_groups", "same_row_group"])
+def test_collect_pois_promotes_drifting_types(collector, tmp_path, save_interval):
+    """Test that a later page with another scalar type widens the column."""
+    pages = [
+        [{"uuid": "a", "rating": 1}],
+        [{"uuid": 2, "rating": 2.5}],
+    ]
+
+    data = collect_pages(collector, pages, tmp_path / "pois.parquet", save_interval)
+
+    assert data["rating"] == [1.0, 2.5]
+    assert data["uuid"] == ["a", "2"]
+
+
+@pytest.mark.parametrize("save_interval", [1, 1000], ids=["separate_row_groups", "same_row_group"])
+def test_collect_pois_keeps_late_columns(collector, tmp_path, save_interval):
+    """Test that columns first seen after page 1 are kept (null before they appear)."""
+    pages = [
+        [{"uuid": "a", "label": "Musée"}],
+        [{
+            "uuid": "b",
+            "label": "Hôtel",
+            "email": "contact@hotel.fr",
+            "hasContact": [{"phone": "01"}]
+        }],
+    ]
+
+    data = collect_pages(collector, pages, tmp_path / "pois.parquet", save_interval)
+
+    assert list(data) == ["uuid", "label", "email", "hasContact"]
+    assert data["email"] == [None, "contact@hotel.fr"]
+    assert data["hasContact"] == [None, '[{"phone":"01"}]']
+
+
+@pytest.mark.parametrize("later_value", ["Musée", 42], ids=["string", "int"])
+def test_collect_pois_keeps_scalars_after_null_page(collector, tmp_path, later_value):
+    """Test that a column empty on page 1 keeps its later scalar values as-is (not JSON)."""
+    pages = [
+        [{"uuid": "a", "label": None}],
+        [{"uuid": "b", "label": later_value}],
+    ]
+
+    data = collect_pages(collector, pages, tmp_path / "pois.parquet", save_interval=1)
+
+    assert data["label"] == [None, later_value]
+
+
+@pytest.mark.parametrize("later_value,stored", [("01 23 45 67 89", "01 23 45 67 89"), (5, "5")],
+                         ids=["string", "numpy_int"])
+def test_collect_pois_json_column_scalars(collector, tmp_path, later_value, stored):
+    """Test that scalars in a JSON column are stored as text, strings without re-encoding."""
+    pages = [
+        [{"uuid": "a", "hasContact": [{"phone": "01"}]}],
+        # A page of plain ints is read by pandas as int64 (NumPy scalars)
+        [{"uuid": "b", "hasContact": later_value}],
+    ]
+
+    data = collect_pages(collector, pages, tmp_path / "pois.parquet", save_interval=1)
+
+    assert data["hasContact"] == ['[{"phone":"01"}]', stored]
+
+
+@pytest.mark.parametrize("later_value", [{"phone": "01"}, [{"phone": "01"}]], ids=["dict", "list"])
+def test_collect_pois_scalar_column_turns_json(collector, tmp_path, later_value):
+    """Test that a column seen as scalar switches to JSON when objects appear later."""
+    pages = [
+        [{"uuid": "a", "hasContact": "01 23 45 67 89"}],
+        [{"uuid": "b", "hasContact": later_value}, {"uuid": "c", "hasContact": "02"}],
+        [{"uuid": "d", "hasContact": later_value}],
+    ]
+
+    data = collect_pages(collector, pages, tmp_path / "pois.parquet", save_interval=1)
+
+    encoded = '{"phone":"01"}' if isinstance(later_value, dict) else '[{"phone":"01"}]'
+    assert data["hasContact"] == ["01 23 45 67 89", encoded, "02", encoded]
@@ -12,10 +12,12 @@ Tests cover:
 Author: Nicolas Angougeard
 """
 
+import os
 import pytest
 import numpy as np
 from pathlib import Path
-from unittest.mock import Mock, patch
+from types import MappingProxyType
+from unittest.mock import Mock
 from datetime import datetime, timedelta
 
 from ml.inference.scorer import POIQualityScorer, POIScoringResult
@@ -25,7 +27,7 @@ from ml.inference.scorer import POIQualityScorer, POIScoringResult
 # Fixtures
 # ============================================
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def sample_poi_complete():
     """Sample POI with complete information."""
     return {
@@ -46,7 +48,7 @@ def sample_poi_complete():
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def sample_poi_minimal():
     """Sample POI with minimal information."""
     return {
@@ -57,15 +59,67 @@ def sample_poi_minimal():
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_model():
     """Mock ML model for testing."""
     model = Mock()
-    model.predict.return_value = np.array([85.5])
+    model.predict.side_effect = lambda X: np.full(len(X), 85.5)
     model.feature_importances_ = np.random.random(17)
     return model
 
 
+@pytest.fixture(scope="session")
+def feature_scorer():
+    """Model-less scorer for feature extraction tests."""
+    return POIQualityScorer(load_model=False)
+
+
+@pytest.fixture(scope="session")
+def model_path(tmp_path_factory):
+    """Placeholder model file shared by the session (loading is mocked)."""
+    path = tmp_path_factory.mktemp("scorer") / "test_model.pkl"
+    path.touch()
+    return path
+
+
+@pytest.fixture(scope="session")
+def scorer(mock_model, model_path):
+    """Scorer built once for the session around the mock model."""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr('ml.inference.scorer._load', lambda path: mock_model)
+        return POIQualityScorer(model_path=model_path)
+
+
+@pytest.fixture(scope="module")
+def scored_samples(scorer, sample_poi_complete, sample_poi_minimal):
+    """Sample POIs scored in a single batch, keyed by POI id."""
+    results = scorer.score_batch([sample_poi_complete, sample_poi_minimal])
+    return {result.poi_id: result for result in results}
+
+
+@pytest.fixture
+def cache_model_path(tmp_path):
+    """Model file private to one test, so cache hits only come from that test."""
+    path = tmp_path / "cached_model.pkl"
+    path.touch()
+    return path
+
+
+@pytest.fixture
+def load_calls(mock_model, monkeypatch):
+    """Record every real model load, starting from an empty cache."""
+    calls = []
+
+    def load(path):
+        calls.append(path)
+        return mock_model
+
+    POIQualityScorer.clear_cache()
+    monkeypatch.setattr('ml.inference.scorer._load', load)
+    yield calls
+    POIQualityScorer.clear_cache()
+
+
 # ============================================
 # Test POIQualityScorer Initialization
 # ============================================
@@ -77,23 +131,54 @@ def test_scorer_initialization_default_path():
         scorer = POIQualityScorer()
 
 
-def test_scorer_initialization_custom_path(mock_model, tmp_path):
+def test_scorer_initialization_custom_path(mock_model, model_path, monkeypatch):
     """Test scorer initialization with custom model path."""
-    model_path = tmp_path / "test_model.pkl"
+    POIQualityScorer.clear_cache()
+    monkeypatch.setattr('ml.inference.scorer._load', lambda path: mock_model)
 
-    with patch('ml.inference.scorer.joblib.load', return_value=mock_model):
-        scorer = POIQualityScorer(model_path=model_path)
-        assert scorer.model is not None
+    scorer = POIQualityScorer(model_path=model_path)
+    assert scorer.model is not None
+
+
+# ============================================
+# Test Model Cache
+# ============================================
+
+def test_model_cache_loads_same_path_once(load_calls, cache_model_path):
+    """Test that scorers built on the same unchanged file share one load."""
+    first = POIQualityScorer(model_path=cache_model_path)
+    second = POIQualityScorer(model_path=cache_model_path)
+
+    assert load_calls == [str(cache_model_path)]
+    assert first.model is second.model
+
+
+def test_model_cache_reloads_modified_file(load_calls, cache_model_path):
+    """Test that a new modification time triggers a fresh load."""
+    POIQualityScorer(model_path=cache_model_path)
+    mtime = cache_model_path.stat().st_mtime
+    os.utime(cache_model_path, (mtime + 10, mtime + 10))
+    POIQualityScorer(model_path=cache_model_path)
+
+    assert len(load_calls) == 2
+
+
+def test_model_cache_clear_forces_reload(load_calls, cache_model_path):
+    """Test that clear_cache drops the cached model."""
+    POIQualityScorer(model_path=cache_model_path)
+    POIQualityScorer.clear_cache()
+    POIQualityScorer(model_path=cache_model_path)
+
+    assert len(load_calls) == 2
 
 
 # ============================================
 # Test Feature Extraction
 # ============================================
 
-def test_extract_features_complete_poi(sample_poi_complete):
+def test_extract_features_complete_poi(feature_scorer, sample_poi_complete):
     """Test feature extraction with complete POI data."""
-    scorer = POIQualityScorer.__new__(POIQualityScorer)
-    features = scorer.extract_features(sample_poi_complete)
+    features = feature_scorer.extract_features_dict(sample_poi_complete)
 
     # Check all required features are present
     assert len(features) == 17
@@ -117,10 +202,9 @@ def test_extract_features_complete_poi(sample_poi_complete):
     assert features["longitude"] == 2.2945
 
 
-def test_extract_features_minimal_poi(sample_poi_minimal):
+def test_extract_features_minimal_poi(feature_scorer, sample_poi_minimal):
     """Test feature extraction with minimal POI data."""
-    scorer = POIQualityScorer.__new__(POIQualityScorer)
-    features = scorer.extract_features(sample_poi_minimal)
+    features = feature_scorer.extract_features_dict(sample_poi_minimal)
 
     # Check completeness features (most should be 0.0)
     assert features["has_name"] == 1.0
@@ -135,9 +219,8 @@ def test_extract_features_minimal_poi(sample_poi_minimal):
     assert features["population"] == 10000  # default
 
 
-def test_extract_features_freshness():
+def test_extract_features_freshness(feature_scorer):
     """Test freshness feature calculation."""
-    scorer = POIQualityScorer.__new__(POIQualityScorer)
 
     # Recent POI (updated 30 days ago)
     recent_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
@@ -147,7 +230,7 @@ def test_extract_features_freshness():
         "latitude": 48.0,
         "longitude": 2.0
     }
-    features_recent = scorer.extract_features(poi_recent)
+    features_recent = feature_scorer.extract_features_dict(poi_recent)
     assert features_recent["is_recent"] == 1.0
     assert features_recent["days_since_update"] < 100
 
@@ -159,22 +242,47 @@ def test_extract_features_freshness():
         "latitude": 48.0,
         "longitude": 2.0
     }
-    features_old = scorer.extract_features(poi_old)
+    features_old = feature_scorer.extract_features_dict(poi_old)
     assert features_old["is_recent"] == 0.0
     assert features_old["days_since_update"] > 300
 
 
+def test_extract_features_batch_matches_single_poi(feature_scorer, sample_poi_complete,
+                                                   sample_poi_minimal):
+    """Test that each batch row equals the single-POI extraction, with mixed fields."""
+    recent_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+    pois = [
+        sample_poi_complete,
+        sample_poi_minimal,
+        {"id": "no_gps", "name": "Gîte", "latitude": 45.0, "longitude": None,
+         "email": "gite@example.fr", "images": ["a.jpg"], "updated_at": recent_date},
+        {"id": "nones", "name": None, "description": None, "num_images": None,
+         "population": None, "updated_at": "not a date"},
+        {},
+    ]
+
+    matrix = feature_scorer.extract_features_batch(pois)
+
+    assert matrix.shape == (len(pois), len(POIQualityScorer.REQUIRED_FEATURES))
+    for row, poi in zip(matrix, pois):
+        np.testing.assert_array_equal(row, feature_scorer.extract_features(poi))
+
+    # Rows keep their own values (no leakage between present and missing fields)
+    features = [dict(zip(POIQualityScorer.REQUIRED_FEATURES, row)) for row in matrix]
+    assert [f["has_gps"] for f in features] == [1.0, 1.0, 0.0, 0.0, 0.0]
+    assert [f["has_contact"] for f in features] == [1.0, 0.0, 1.0, 0.0, 0.0]
+    assert [f["has_images"] for f in features] == [1.0, 0.0, 1.0, 0.0, 0.0]
+    assert [f["is_recent"] for f in features] == [0.0, 0.0, 1.0, 0.0, 0.0]
+    assert features[2]["latitude"] == 45.0 and features[2]["longitude"] == 0.0
+    assert features[3]["population"] == 10000.0
+
+
 # ============================================
 # Test POI Scoring
 # ============================================
 
-@patch('ml.inference.scorer.joblib.load')
-def test_score_poi_returns_valid_result(mock_load, mock_model, sample_poi_complete, tmp_path):
+def test_score_poi_returns_valid_result(scorer, sample_poi_complete):
     """Test that score_poi returns a valid POIScoringResult."""
-    mock_load.return_value = mock_model
-    model_path = tmp_path / "test_model.pkl"
-
-    scorer = POIQualityScorer(model_path=model_path)
     result = scorer.score_poi(sample_poi_complete)
 
     assert isinstance(result, POIScoringResult)
@@ -184,13 +292,8 @@ def test_score_poi_returns_valid_result(mock_load, mock_model, sample_poi_comple
     assert result.model_version is not None
 
 
-@patch('ml.inference.scorer.joblib.load')
-def test_score_poi_with_features(mock_load, mock_model, sample_poi_complete, tmp_path):
+def test_score_poi_with_features(scorer, sample_poi_complete):
     """Test scoring with feature return enabled."""
-    mock_load.return_value = mock_model
-    model_path = tmp_path / "test_model.pkl"
-
-    scorer = POIQualityScorer(model_path=model_path)
     result = scorer.score_poi(sample_poi_complete, return_features=True)
 
     assert len(result.features) == 17
@@ -198,39 +301,68 @@ def test_score_poi_with_features(mock_load, mock_model, sample_poi_complete, tmp
     assert "quality_score" not in result.features  # score is not a feature
 
 
-@patch('ml.inference.scorer.joblib.load')
-def test_score_batch(mock_load, mock_model, sample_poi_complete, sample_poi_minimal, tmp_path):
+def test_score_batch(scored_samples):
     """Test batch scoring of multiple POIs."""
-    mock_load.return_value = mock_model
-    model_path = tmp_path / "test_model.pkl"
+    assert list(scored_samples) == ["poi_001", "poi_002"]
+    assert all(isinstance(r, POIScoringResult) for r in scored_samples.values())
+
+
+def make_placeholder_result():
+    """Stale result to be overwritten by scoring."""
+    return POIScoringResult(
+        poi_id="stale",
+        quality_score=0.0,
+        confidence=0.0,
+        features={},
+        timestamp="2000-01-01T00:00:00",
+        model_version="old"
+    )
+
+
+def test_score_batch_overwrites_out(scorer, sample_poi_complete, sample_poi_minimal):
+    """Test that results passed as out are overwritten in place and returned."""
+    out = [make_placeholder_result(), make_placeholder_result()]
+    originals = list(out)
+
+    results = scorer.score_batch(
+        [sample_poi_complete, sample_poi_minimal], return_features=True, out=out
+    )
+
+    assert results is out
+    assert all(result is original for result, original in zip(results, originals))
+    assert [r.poi_id for r in results] == ["poi_001", "poi_002"]
+    assert all(r.quality_score == 85.5 for r in results)
+    assert all(len(r.features) == 17 for r in results)
+    assert all(r.model_version == scorer.model_version for r in results)
+    assert results[0].confidence > results[1].confidence
 
-    scorer = POIQualityScorer(model_path=model_path)
-    pois = [sample_poi_complete, sample_poi_minimal]
-    results = scorer.score_batch(pois)
 
-    assert len(results) == 2
-    assert all(isinstance(r, POIScoringResult) for r in results)
-    assert results[0].poi_id == "poi_001"
-    assert results[1].poi_id == "poi_002"
+def test_score_poi_overwrites_out(scorer, sample_poi_complete):
+    """Test that score_poi reuses the result passed as out."""
+    out = make_placeholder_result()
+
+    result = scorer.score_poi(sample_poi_complete, out=out)
+
+    assert result is out
+    assert result.poi_id == "poi_001"
+    assert result.features == {}
+
+
+def test_score_batch_out_length_mismatch(scorer, sample_poi_complete, sample_poi_minimal):
+    """Test that out must hold exactly one result per POI."""
+    with pytest.raises(ValueError):
+        scorer.score_batch(
+            [sample_poi_complete, sample_poi_minimal], out=[make_placeholder_result()]
+        )
 
 
 # ============================================
 # Test Confidence Calculation
 # ============================================
 
-@patch('ml.inference.scorer.joblib.load')
-def test_confidence_higher_for_complete_poi(mock_load, mock_model,
-                                            sample_poi_complete, sample_poi_minimal, tmp_path):
+def test_confidence_higher_for_complete_poi(scored_samples):
     """Test that confidence is higher for POIs with more complete data."""
-    mock_load.return_value = mock_model
-    model_path = tmp_path / "test_model.pkl"
-
-    scorer = POIQualityScorer(model_path=model_path)
-
-    result_complete = scorer.score_poi(sample_poi_complete)
-    result_minimal = scorer.score_poi(sample_poi_minimal)
-
-    assert result_complete.confidence > result_minimal.confidence
+    assert scored_samples["poi_001"].confidence > scored_samples["poi_002"].confidence
 
 
 # ============================================
@@ -256,17 +388,40 @@ def test_scoring_result_to_dict():
     assert "has_name" in result_dict["features"]
 
 
+def test_scoring_result_to_dict_batch():
+    """Test batch serialization matches per-result to_dict."""
+    results = [
+        POIScoringResult(
+            poi_id="test_001",
+            quality_score=85.5555,
+            confidence=0.91234,
+            features={"has_name": 1.0, "description_length": 12.34567},
+            timestamp="2025-01-15T10:30:00",
+            model_version="v1.0.0"
+        ),
+        POIScoringResult(
+            poi_id="test_002",
+            quality_score=40.0,
+            confidence=0.5,
+            features={},
+            timestamp="2025-01-15T10:30:00",
+            model_version="v1.0.0"
+        ),
+    ]
+
+    batch = POIScoringResult.to_dict_batch(results)
+
+    assert batch == [result.to_dict() for result in results]
+    assert batch[1]["features"] == {}
+    assert POIScoringResult.to_dict_batch([]) == []
+
+
 # ============================================
 # Test Feature Importance
 # ============================================
 
-@patch('ml.inference.scorer.joblib.load')
-def test_get_feature_importance(mock_load, mock_model, tmp_path):
+def test_get_feature_importance(scorer):
     """Test feature importance extraction."""
-    mock_load.return_value = mock_model
-    model_path = tmp_path / "test_model.pkl"
-
-    scorer = POIQualityScorer(model_path=model_path)
     importance = scorer.get_feature_importance(top_n=5)
 
     assert len(importance) <= 5
@@ -277,13 +432,8 @@ def test_get_feature_importance(mock_load, mock_model, tmp_path):
 # Test Model Info
 # ============================================
 
-@patch('ml.inference.scorer.joblib.load')
-def test_get_model_info(mock_load, mock_model, tmp_path):
+def test_get_model_info(scorer):
     """Test model info retrieval."""
-    mock_load.return_value = mock_model
-    model_path = tmp_path / "test_model.pkl"
-
-    scorer = POIQualityScorer(model_path=model_path)
     info = scorer.get_model_info()
 
     assert "model_type" in info
@@ -296,40 +446,41 @@ def test_get_model_info(mock_load, mock_model, tmp_path):
 # Test Edge Cases & Error Handling
 # ============================================
 
-def test_extract_features_with_none_values():
-    """Test feature extraction handles None values gracefully."""
-    scorer = POIQualityScorer.__new__(POIQualityScorer)
-    poi_with_nones = {
-        "id": "test",
-        "name": None,
-        "description": None,
-        "latitude": None,
-        "longitude": None
-    }
-
-    features = scorer.extract_features(poi_with_nones)
-
-    assert features["has_name"] == 0.0
-    assert features["has_description"] == 0.0
-    assert features["has_gps"] == 0.0
-
-
-def test_extract_features_with_empty_strings():
-    """Test feature extraction handles empty strings."""
-    scorer = POIQualityScorer.__new__(POIQualityScorer)
-    poi_empty = {
-        "id": "test",
-        "name": "",
-        "description": "",
-        "latitude": 48.0,
-        "longitude": 2.0
-    }
-
-    features = scorer.extract_features(poi_empty)
-
-    assert features["has_name"] == 0.0
-    assert features["has_description"] == 0.0
-    assert features["description_length"] == 0.0
+# POI with every optional field missing, shared by the edge-case tests
+_EMPTY_POI = MappingProxyType({
+    "id": "test",
+    "name": None,
+    "description": None,
+    "latitude": None,
+    "longitude": None
+})
+
+
+@pytest.mark.parametrize("overrides,expected", [
+    # None values are handled gracefully
+    ({}, {"has_name": 0.0, "has_description": 0.0, "has_gps": 0.0}),
+    # Empty strings count as missing
+    (
+        {"name": "", "description": "", "latitude": 48.0, "longitude": 2.0},
+        {"has_name": 0.0, "has_description": 0.0, "description_length": 0.0}
+    ),
+], ids=["none_values", "empty_strings"])
+def test_extract_features_edge_cases(feature_scorer, overrides, expected):
+    """Test feature extraction on POIs with missing or empty fields."""
+    features = feature_scorer.extract_features_dict({**_EMPTY_POI, **overrides})
+
+    for name, value in expected.items():
+        assert features[name] == value
+
+
+def test_scoring_without_model_raises(feature_scorer, sample_poi_complete):
+    """Test that a scorer built with load_model=False refuses to score."""
+    assert feature_scorer.model is None
+
+    with pytest.raises(RuntimeError):
+        feature_scorer.score_poi(sample_poi_complete)
+    with pytest.raises(RuntimeError):
+        feature_scorer.score_batch([sample_poi_complete])
 
 
 if __name__ == "__main__":